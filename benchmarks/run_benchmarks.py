@@ -0,0 +1,435 @@
+"""
+Benchmarks for the hot paths of the mortgages package.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json
+
+Every benchmark runs over a range of sizes (loans, paths or dt) so the
+results show how each hot path scales. Results are written to JSON
+and, if a baseline is given, any benchmark that is slower or uses more
+memory than the baseline by more than the threshold is reported as a
+regression. Changes below an absolute floor (1 ms or 1 MB by default)
+are treated as noise.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mortgages as mtg  # noqa: E402
+
+
+def bench_import(processes, name=None):
+    """
+    Imports the package in fresh interpreters, optionally using one
+    public name. Fails if pandas is imported by a name that does not
+    need it, so lazy loading cannot silently break.
+    """
+
+    code = "import sys\nimport mortgages\n"
+    if name is not None:
+        code += "mortgages.{}\n".format(name)
+    code += "assert 'pandas' not in sys.modules, 'pandas imported'\n"
+
+    for i in range(processes):
+        subprocess.run([sys.executable, "-c", code], check=True,
+                       cwd=ROOT)
+
+
+def bench_fixed(loans):
+    """
+    Builds the amortization schedule of many Fixed loans one by one.
+    """
+
+    for i in range(loans):
+        mtg.Fixed(200000.0, 0.05, 30).amortization
+
+
+def bench_adjustable(loans):
+    """
+    Builds the amortization schedule of many Adjustable loans one by
+    one.
+    """
+
+    r_annual = np.repeat([0.05, 0.06, 0.07], 100)
+    for i in range(loans):
+        mtg.Adjustable(200000.0, r_annual, 30, 0.04, 5).amortization
+
+
+def bench_loanbook(loans):
+    """
+    Builds the amortization schedule of a LoanBook in one call.
+    """
+
+    random_state = np.random.default_rng(0)
+    book = mtg.LoanBook(random_state.uniform(1e5, 5e5, loans),
+                        random_state.uniform(0.03, 0.07, loans),
+                        random_state.choice([15, 30], loans))
+    book.create_amortization_schedule()
+
+
+def bench_pool_mortgage(pools):
+    """
+    Builds the pooled DataFrame of many Mbs instances.
+    """
+
+    mortgage = mtg.Fixed(200000.0, 0.05, 30)
+    smm = np.full(mortgage.months+1, 0.01)
+    for i in range(pools):
+        mtg.Mbs(mortgage, smm).pooled
+
+
+def bench_market_value(paths):
+    """
+    Discounts one cash flow vector under many rate paths, one path at
+    a time with calc_market_value.
+    """
+
+    cash_flow = np.ones(361)
+    market_rates = np.full((361, paths), 0.04)
+    for p in range(paths):
+        mtg.calc_market_value(cash_flow, market_rates[:, p])
+
+
+def bench_market_value_paths(paths):
+    """
+    Discounts one cash flow vector under many rate paths at once with
+    calc_market_value_paths.
+    """
+
+    cash_flow = np.ones(361)
+    market_rates = np.full((361, paths), 0.04)
+    mtg.calc_market_value_paths(cash_flow, market_rates)
+
+
+def bench_vasicek_paths(paths, dt=1.0/12.0, method="euler"):
+    """
+    Creates Vasicek short-rate paths over 30 years.
+    """
+
+    rates = mtg.VasicekRates(0.04, 0.3, 0.045, 0.01, 30)
+    rates.create_paths(dt, paths, method=method)
+
+
+def bench_vasicek_steps(steps, dt=1.0/12.0):
+    """
+    Creates Vasicek short-rate paths over 30 years with enough paths
+    for the given total number of simulated steps.
+    """
+
+    bench_vasicek_paths(steps // int(round(30.0/dt)), dt)
+
+
+def bench_cir_paths(paths, dt=1.0/12.0, method="euler"):
+    """
+    Creates CIR short-rate paths over 30 years.
+    """
+
+    rates = mtg.CirRates(0.04, 0.3, 0.045, 0.05, 30)
+    rates.create_paths(dt, paths, method=method)
+
+
+def bench_monte_carlo_price(paths, chunk_size=None):
+    """
+    Prices zero-coupon bonds with Monte Carlo over 30 years.
+    """
+
+    rates = mtg.VasicekRates(0.04, 0.3, 0.045, 0.01, 30)
+    rates.calc_monte_carlo_price(1.0/12.0, paths, chunk_size=chunk_size)
+
+
+def bench_brent(problems):
+    """
+    Solves implied rates one loan at a time with brent.
+    """
+
+    def pmt_error(r_monthly, pmt):
+        return mtg.calc_pmt(200000.0, r_monthly, 360) - pmt
+
+    pmts = mtg.calc_pmt(200000.0, np.linspace(0.002, 0.007, problems),
+                        360)
+    for pmt in pmts:
+        mtg.brent(pmt_error, 1e-6, 0.05, args=(pmt,))
+
+
+def bench_brent_vectorized(problems):
+    """
+    Solves implied rates for all loans at once with brent_vectorized.
+    """
+
+    def pmt_error(r_monthly, pmt):
+        return mtg.calc_pmt(200000.0, r_monthly, 360) - pmt
+
+    pmts = mtg.calc_pmt(200000.0, np.linspace(0.002, 0.007, problems),
+                        360)
+    mtg.brent_vectorized(pmt_error, 1e-6, 0.05, vector_args=(pmts,))
+
+
+def create_cases(quick=False):
+    """
+    Creates the list of benchmark cases.
+
+    Parameters
+    ----------
+    quick: bool
+        Whether to use small sizes only.
+
+    Returns
+    -------
+    cases: list
+        Tuples of the case name, size name, size, function and keyword
+        arguments.
+    """
+
+    def sizes(small, large):
+        return small if quick else small + large
+
+    cases = []
+
+    for processes in sizes([5], [20]):
+        cases.append(("import", "processes", processes, bench_import,
+                      {}))
+        cases.append(("import_rates", "processes", processes,
+                      bench_import, {"name": "VasicekRates"}))
+        cases.append(("import_rootfinding", "processes", processes,
+                      bench_import, {"name": "brent"}))
+
+    for loans in sizes([10, 100], [1000]):
+        cases.append(("fixed", "loans", loans, bench_fixed, {}))
+        cases.append(("adjustable", "loans", loans, bench_adjustable,
+                      {}))
+
+    for loans in sizes([1000, 10000], [100000]):
+        cases.append(("loanbook", "loans", loans, bench_loanbook, {}))
+
+    for pools in sizes([10, 100], [1000]):
+        cases.append(("pool_mortgage", "pools", pools,
+                      bench_pool_mortgage, {}))
+
+    for paths in sizes([100, 1000], [10000]):
+        cases.append(("market_value", "paths", paths,
+                      bench_market_value, {}))
+        cases.append(("market_value_paths", "paths", paths,
+                      bench_market_value_paths, {}))
+
+    for paths in sizes([1000, 10000], [100000]):
+        for method in ["euler", "exact"]:
+            cases.append(("vasicek_paths_" + method, "paths", paths,
+                          bench_vasicek_paths, {"method": method}))
+        for method in ["euler", "full_truncation", "exact"]:
+            cases.append(("cir_paths_" + method, "paths", paths,
+                          bench_cir_paths, {"method": method}))
+
+    # Same number of paths for every dt, so throughput is in total
+    # simulated steps (paths x steps):
+    for dt in [1.0/12.0, 1.0/52.0] if quick else \
+            [1.0/12.0, 1.0/52.0, 1.0/252.0]:
+        cases.append(("vasicek_paths_dt", "steps",
+                      1000*int(round(30.0/dt)), bench_vasicek_steps,
+                      {"dt": dt}))
+
+    for paths in sizes([1000, 10000], [100000]):
+        cases.append(("monte_carlo_price", "paths", paths,
+                      bench_monte_carlo_price, {}))
+        cases.append(("monte_carlo_price_chunked", "paths", paths,
+                      bench_monte_carlo_price, {"chunk_size": 10000}))
+
+    for problems in sizes([10, 100], [1000]):
+        cases.append(("brent", "problems", problems, bench_brent, {}))
+
+    for problems in sizes([1000, 100000], [1000000]):
+        cases.append(("brent_vectorized", "problems", problems,
+                      bench_brent_vectorized, {}))
+
+    return cases
+
+
+def run_case(function, size, kwargs, repeat=3):
+    """
+    Times a benchmark case and measures its peak traced memory.
+
+    Parameters
+    ----------
+    function: function
+        Benchmark function.
+    size: int
+        Size passed to the function.
+    kwargs: dict
+        Additional arguments for the function.
+    repeat: int
+        Number of timed runs. The fastest run is reported.
+
+    Returns
+    -------
+    seconds: float
+        Fastest wall time.
+    peak_bytes: int
+        Peak memory allocated during one run.
+    """
+
+    def call():
+        function(size, **kwargs)
+
+    # Time without tracemalloc, which slows allocations down:
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    call()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return min(timings), peak_bytes
+
+
+def run_benchmarks(quick=False, repeat=3, pattern=None):
+    """
+    Runs every benchmark case.
+
+    Parameters
+    ----------
+    quick: bool
+        Whether to use small sizes only.
+    repeat: int
+        Number of timed runs per case.
+    pattern: str
+        Only run cases whose name contains pattern.
+
+    Returns
+    -------
+    results: dict
+        Machine information and the results of every case.
+    """
+
+    results = {"python": platform.python_version(),
+               "numpy": np.__version__,
+               "machine": platform.machine(),
+               "benchmarks": {}}
+
+    for name, size_name, size, function, kwargs in create_cases(quick):
+        if (pattern is not None) and (pattern not in name):
+            continue
+
+        key = "{}[{}={}]".format(name, size_name, size)
+        seconds, peak_bytes = run_case(function, size, kwargs, repeat)
+        results["benchmarks"][key] = {
+            "seconds": seconds,
+            "throughput": size / seconds,
+            "unit": size_name + "/s",
+            "peak_bytes": peak_bytes}
+
+        print("{:<55} {:>10.4f} s {:>14.1f} {:<18} {:>8.1f} MB".format(
+            key, seconds, size/seconds, size_name + "/s",
+            peak_bytes/1e6))
+
+    return results
+
+
+def find_regressions(results, baseline, threshold=0.2,
+                     min_seconds=1e-3, min_bytes=1e6):
+    """
+    Compares results with a baseline.
+
+    Parameters
+    ----------
+    results: dict
+        Results from run_benchmarks.
+    baseline: dict
+        Earlier results from run_benchmarks.
+    threshold: float
+        Allowed relative slowdown (or memory growth) before a case is
+        flagged.
+    min_seconds: float
+        Slowdowns smaller than this many seconds are ignored as noise.
+    min_bytes: int
+        Memory growth smaller than this many bytes is ignored as
+        noise.
+
+    Returns
+    -------
+    regressions: list
+        Tuples of the case name, metric and relative change.
+    """
+
+    regressions = []
+    floors = {"seconds": min_seconds, "peak_bytes": min_bytes}
+
+    for key, result in results["benchmarks"].items():
+        if key not in baseline["benchmarks"]:
+            continue
+
+        for metric in ["seconds", "peak_bytes"]:
+            before = baseline["benchmarks"][key][metric]
+            after = result[metric]
+            if (before > 0) and (after > before*(1.0 + threshold)) and \
+                    (after - before >= floors[metric]):
+                regressions.append((key, metric, after/before - 1.0))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write results to this JSON "
+                        "file.")
+    parser.add_argument("--baseline", help="Compare results with this "
+                        "JSON file.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative slowdown before a "
+                        "case is flagged (default 0.2).")
+    parser.add_argument("--min-seconds", type=float, default=1e-3,
+                        help="Ignore slowdowns smaller than this many "
+                        "seconds (default 0.001).")
+    parser.add_argument("--min-bytes", type=float, default=1e6,
+                        help="Ignore memory growth smaller than this "
+                        "many bytes (default 1e6).")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of timed runs per case.")
+    parser.add_argument("--quick", action="store_true",
+                        help="Only run the small sizes.")
+    parser.add_argument("--filter", dest="pattern",
+                        help="Only run cases whose name contains this "
+                        "text.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.quick, args.repeat, args.pattern)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        regressions = find_regressions(results, baseline,
+                                       args.threshold, args.min_seconds,
+                                       args.min_bytes)
+        for key, metric, change in regressions:
+            print("REGRESSION {} {}: {:+.1%}".format(key, metric,
+                                                     change))
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
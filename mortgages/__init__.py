@@ -1,4 +1,70 @@
-from .mortgages import *
-from .mbs import *
-from .rates import *
-from .rootfinding import *
\ No newline at end of file
+# Public names are loaded lazily from their submodules on first use, so
+# importing the package does not import pandas or unused submodules:
+
+import importlib
+
+submodule_names = {
+    "mortgages": ["calc_pmt", "calc_pmt_derivatives", "calc_balance",
+                  "calc_amortization", "calc_market_value",
+                  "calc_discount_factors", "calc_market_value_paths",
+                  "calc_market_value_derivatives", "calc_wal",
+                  "Mortgage", "Fixed", "Adjustable",
+                  "CompactMortgage"],
+    "loanbook": ["LoanBook"],
+    "mbs": ["calc_smm", "calc_cpr", "calc_pool_cashflows",
+            "calc_wac_wam", "Mbs", "MbsPool"],
+    "rates": ["AffineCoefficientCache", "affine_cache",
+              "calc_forward_rate", "check_random_state",
+              "create_wiener", "iterate_wiener", "draw_wiener_block",
+              "split_paths",
+              "spawn_seeds", "map_blocks", "create_paths_block",
+              "calc_discount_moments", "combine_moments",
+              "InterestRates", "ConstantRates", "VasicekRates",
+              "CirRates"],
+    "rootfinding": ["OptimalRoots", "subset_args", "brent",
+                    "brent_vectorized", "newton"],
+    "montecarlo": ["MbsMonteCarlo"],
+    "yields": ["calc_implied_rate", "calc_implied_yield",
+               "calc_implied_months"],
+    "scenarios": ["ScenarioStore"],
+    "analytics": ["create_time_weights", "calc_wal_batch",
+                  "calc_duration", "calc_principal_window",
+                  "calc_cash_flow_analytics"],
+    "pipeline": ["check_columns", "read_csv_chunks", "read_npy_chunks",
+                 "calc_chunk_cashflows", "add_totals",
+                 "write_loan_results", "write_pool_cashflows",
+                 "run_tape"],
+    "instrumentation": [],
+}
+
+name_submodules = {name: submodule for submodule, names in
+                   submodule_names.items() for name in names}
+
+__all__ = sorted(name_submodules)
+
+
+def __getattr__(name):
+    """
+    Imports the submodule of a public name on first access.
+    """
+
+    if name in submodule_names:
+        return importlib.import_module("." + name, __name__)
+
+    if name not in name_submodules:
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+
+    submodule = importlib.import_module("." + name_submodules[name],
+                                        __name__)
+    value = getattr(submodule, name)
+
+    # Cache the name so later lookups skip __getattr__:
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(name_submodules) |
+                  set(submodule_names))
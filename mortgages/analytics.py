@@ -0,0 +1,170 @@
+# Functions to calculate cash flow analytics for many loans or paths:
+
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=32)
+def create_time_weights(months):
+    """
+    Creates the read-only vector of month indices 0, 1, ..., months - 1
+    used to weight cash flows. Cached, so repeated calls with the same
+    number of months reuse one array.
+
+    Parameters
+    ----------
+    months: int
+        Number of months, including month 0.
+
+    Returns
+    -------
+    time_weights: array_like
+        Month index of every cash flow.
+    """
+
+    time_weights = np.arange(months, dtype=float)
+    time_weights.setflags(write=False)
+
+    return time_weights
+
+
+def calc_wal_batch(principal, original_balance=None):
+    """
+    Finds the weighted average life of every row of principal
+    payments, in months like calc_wal.
+
+    Parameters
+    ----------
+    principal: array_like
+        Principal payments (rows x months + 1). Rows can be loans or
+        simulated paths.
+    original_balance: array_like
+        Original balance of every row.
+        Defaults to the sum of the principal payments.
+
+    Returns
+    -------
+    wal: array_like
+        Weighted average life of every row.
+    """
+
+    principal = np.asarray(principal, dtype=float)
+
+    if original_balance is None:
+        original_balance = principal.sum(axis=-1)
+
+    wal = (principal @ create_time_weights(principal.shape[-1])) / \
+        original_balance
+
+    return wal
+
+
+def calc_duration(cash_flow, yield_annual):
+    """
+    Finds the Macaulay and modified duration of every row of cash
+    flows given a monthly compounded annual yield. Uses the same
+    discounting as calc_market_value.
+
+    Parameters
+    ----------
+    cash_flow: array_like
+        Cash flows (rows x months + 1). The first element of each row
+        is the current month.
+    yield_annual: array_like
+        Annual yield of every row.
+
+    Returns
+    -------
+    macaulay: array_like
+        Macaulay duration in years.
+    modified: array_like
+        Modified duration in years.
+    """
+
+    cash_flow = np.asarray(cash_flow, dtype=float)
+    time_weights = create_time_weights(cash_flow.shape[-1])
+
+    # Discount every cash flow:
+    growth = 1.0 + np.asarray(yield_annual, dtype=float)/12.0
+    growth = np.broadcast_to(growth, cash_flow.shape[:-1])
+    discounted = np.exp(np.multiply.outer(-np.log(growth),
+                                          time_weights))
+    discounted *= cash_flow
+
+    # Time weighted present value over present value:
+    macaulay = (discounted @ time_weights) / \
+        (12.0*discounted.sum(axis=-1))
+    modified = macaulay / growth
+
+    return macaulay, modified
+
+
+def calc_principal_window(principal, tolerance=0.0):
+    """
+    Finds the first and last month in which principal is paid for
+    every row.
+
+    Parameters
+    ----------
+    principal: array_like
+        Principal payments (rows x months + 1).
+    tolerance: float
+        Payments at or below tolerance are ignored.
+        Defaults to 0.
+
+    Returns
+    -------
+    first_month: array_like
+        First month with principal. -1 if there is none.
+    last_month: array_like
+        Last month with principal. -1 if there is none.
+    """
+
+    paid = np.asarray(principal) > tolerance
+    any_paid = paid.any(axis=-1)
+    months = paid.shape[-1]
+
+    first_month = np.where(any_paid, paid.argmax(axis=-1), -1)
+    last_month = np.where(any_paid,
+                          months - 1 - paid[..., ::-1].argmax(axis=-1),
+                          -1)
+
+    return first_month, last_month
+
+
+def calc_cash_flow_analytics(principal, cash_flow, yield_annual,
+                             original_balance=None):
+    """
+    Calculates the weighted average life, durations and principal
+    window of every row at once.
+
+    Parameters
+    ----------
+    principal: array_like
+        Principal payments (rows x months + 1).
+    cash_flow: array_like
+        Total cash flows (rows x months + 1).
+    yield_annual: array_like
+        Annual yield of every row.
+    original_balance: array_like
+        Original balance of every row.
+        Defaults to the sum of the principal payments.
+
+    Returns
+    -------
+    analytics: dict
+        Arrays for the wal, macaulay_duration, modified_duration,
+        first_principal_month and last_principal_month.
+    """
+
+    macaulay, modified = calc_duration(cash_flow, yield_annual)
+    first_month, last_month = calc_principal_window(principal)
+
+    analytics = {"wal": calc_wal_batch(principal, original_balance),
+                 "macaulay_duration": macaulay,
+                 "modified_duration": modified,
+                 "first_principal_month": first_month,
+                 "last_principal_month": last_month}
+
+    return analytics
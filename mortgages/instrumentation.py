@@ -0,0 +1,346 @@
+# Opt-in instrumentation of the hot paths:
+#
+# Functions decorated with instrument record call counts, wall time,
+# result sizes and, optionally, allocated bytes once recording is
+# enabled. While disabled, the decorator only checks a flag. This
+# module must not import other modules of the package, so any of them
+# can import it without an import cycle.
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Recorder(object):
+    """
+    Class for the state of the instrumentation.
+
+    Parameters
+    ----------
+    enabled: bool
+        Whether calls are recorded.
+    track_memory: bool
+        Whether allocated bytes are measured with tracemalloc.
+    started_tracing: bool
+        Whether enable started tracemalloc, so disable stops it.
+    trace: bool
+        Whether every call is kept as a trace event.
+    stats: dict
+        Statistics of every instrumented function by name.
+    events: list
+        Trace events in the Chrome trace event format.
+    max_events: int
+        Maximum number of trace events kept.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.started_tracing = False
+        self.trace = False
+        self.stats = {}
+        self.events = []
+        self.max_events = 1000000
+        self.start_time = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def add_call(self, name, start, seconds, result_bytes,
+                 allocated_bytes, evaluations):
+        """
+        Adds one call to the statistics and the trace events.
+        """
+
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = {
+                    "calls": 0, "seconds": 0.0, "max_seconds": 0.0,
+                    "result_bytes": 0, "allocated_bytes": 0,
+                    "evaluations": 0}
+
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["result_bytes"] += result_bytes
+            stats["allocated_bytes"] += allocated_bytes
+            stats["evaluations"] += evaluations
+
+            if self.trace and (len(self.events) < self.max_events):
+                self.events.append({
+                    "name": name, "ph": "X", "cat": "mortgages",
+                    "ts": (start - self.start_time)*1e6,
+                    "dur": seconds*1e6, "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": {"result_bytes": result_bytes,
+                             "allocated_bytes": allocated_bytes,
+                             "evaluations": evaluations}})
+
+
+recorder = Recorder()
+
+
+def enable(track_memory=False, trace=False):
+    """
+    Starts recording instrumented calls.
+
+    Parameters
+    ----------
+    track_memory: bool
+        Whether to measure the bytes allocated by every call with
+        tracemalloc. Slows down every allocation while enabled.
+        Defaults to False.
+    trace: bool
+        Whether to keep every call as a trace event for
+        export_chrome_trace.
+        Defaults to False.
+    """
+
+    # Only stop tracemalloc in disable if it is started here:
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        recorder.started_tracing = True
+
+    recorder.track_memory = track_memory
+    recorder.trace = trace
+    recorder.enabled = True
+
+
+def disable():
+    """
+    Stops recording instrumented calls. The statistics are kept until
+    reset is called. tracemalloc is only stopped if enable started it.
+    """
+
+    recorder.enabled = False
+
+    if recorder.started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    recorder.started_tracing = False
+    recorder.track_memory = False
+
+
+def reset():
+    """
+    Clears the statistics and trace events in place, so the dict
+    yielded by record stays live.
+    """
+
+    with recorder.lock:
+        recorder.stats.clear()
+        recorder.events.clear()
+        recorder.start_time = time.perf_counter()
+
+
+@contextmanager
+def record(track_memory=False, trace=False):
+    """
+    Context manager that records instrumented calls inside its block.
+
+    Parameters
+    ----------
+    track_memory: bool
+        See enable.
+    trace: bool
+        See enable.
+
+    Returns
+    -------
+    stats: dict
+        Live statistics, the same dict as get_report returns.
+    """
+
+    enable(track_memory, trace)
+    try:
+        yield recorder.stats
+    finally:
+        disable()
+
+
+def calc_result_bytes(result):
+    """
+    Finds the number of bytes held by the arrays in a result. Handles
+    arrays, DataFrames, tuples, lists, dicts and objects holding a
+    root_value array.
+
+    Parameters
+    ----------
+    result: object
+        Value returned by an instrumented function.
+
+    Returns
+    -------
+    result_bytes: int
+        Total bytes of the arrays in the result.
+    """
+
+    if hasattr(result, "nbytes"):
+        return int(result.nbytes)
+
+    if hasattr(result, "memory_usage"):
+        return int(result.memory_usage(index=False).sum())
+
+    if isinstance(result, (tuple, list)):
+        return sum(calc_result_bytes(x) for x in result)
+
+    if isinstance(result, dict):
+        return sum(calc_result_bytes(x) for x in result.values())
+
+    if hasattr(result, "root_value"):
+        return calc_result_bytes(result.root_value)
+
+    return 0
+
+
+def instrument(function=None, name=None, count_evaluations=False):
+    """
+    Decorator that records the calls of a function while recording is
+    enabled. Can be used as @instrument or @instrument(...).
+
+    Parameters
+    ----------
+    function: function
+        Function to instrument.
+    name: str
+        Name in the report.
+        Defaults to the qualified name of the function.
+    count_evaluations: bool
+        Whether the first argument is a function whose evaluations are
+        counted, as for the root finders.
+        Defaults to False.
+
+    Returns
+    -------
+    wrapper: function
+        Instrumented function.
+    """
+
+    if function is None:
+        return functools.partial(instrument, name=name,
+                                 count_evaluations=count_evaluations)
+
+    if name is None:
+        name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not recorder.enabled:
+            return function(*args, **kwargs)
+
+        # Count the evaluations of the function argument:
+        evaluations = [0]
+        if count_evaluations and args:
+            f = args[0]
+
+            def counted(*f_args, **f_kwargs):
+                evaluations[0] += 1
+                return f(*f_args, **f_kwargs)
+
+            args = (counted,) + args[1:]
+
+        track_memory = recorder.track_memory and \
+            tracemalloc.is_tracing()
+        if track_memory:
+            memory_start = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        seconds = time.perf_counter() - start
+
+        # Net bytes still allocated after the call:
+        allocated_bytes = 0
+        if track_memory:
+            allocated_bytes = max(
+                tracemalloc.get_traced_memory()[0] - memory_start, 0)
+
+        recorder.add_call(name, start, seconds,
+                          calc_result_bytes(result), allocated_bytes,
+                          evaluations[0])
+
+        return result
+
+    return wrapper
+
+
+def get_report():
+    """
+    Gets the statistics of every instrumented function called while
+    recording was enabled. Calls made in worker processes are not
+    included.
+
+    Returns
+    -------
+    report: dict
+        For every function name, a dict with calls, seconds (total),
+        mean_seconds, max_seconds, result_bytes, allocated_bytes and
+        evaluations.
+    """
+
+    with recorder.lock:
+        report = {}
+        for name, stats in recorder.stats.items():
+            report[name] = dict(stats)
+            report[name]["mean_seconds"] = \
+                stats["seconds"] / stats["calls"]
+
+    return report
+
+
+def format_report(sort_by="seconds"):
+    """
+    Formats the statistics as a text table.
+
+    Parameters
+    ----------
+    sort_by: str
+        Statistic to sort the functions by, largest first.
+        Defaults to seconds.
+
+    Returns
+    -------
+    table: str
+        One line per instrumented function.
+    """
+
+    report = get_report()
+    names = sorted(report, key=lambda x: report[x][sort_by],
+                   reverse=True)
+
+    lines = ["{:<40} {:>8} {:>11} {:>11} {:>12} {:>12} {:>8}".format(
+        "function", "calls", "seconds", "mean", "result_MB",
+        "alloc_MB", "evals")]
+    for name in names:
+        stats = report[name]
+        lines.append(
+            "{:<40} {:>8} {:>11.4f} {:>11.6f} {:>12.2f} {:>12.2f} "
+            "{:>8}".format(name, stats["calls"], stats["seconds"],
+                           stats["mean_seconds"],
+                           stats["result_bytes"]/1e6,
+                           stats["allocated_bytes"]/1e6,
+                           stats["evaluations"]))
+
+    return "\n".join(lines)
+
+
+def export_chrome_trace(filename):
+    """
+    Writes the trace events in the Chrome trace event format, which can
+    be opened in chrome://tracing or Perfetto. Events are only kept
+    while recording with trace=True.
+
+    Parameters
+    ----------
+    filename: str
+        Path of the JSON file.
+    """
+
+    with recorder.lock:
+        events = list(recorder.events)
+
+    with open(filename, "w") as file:
+        json.dump({"traceEvents": events,
+                   "displayTimeUnit": "ms"}, file)
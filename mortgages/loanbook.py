@@ -0,0 +1,88 @@
+# Class to calculate payments/amortization for many loans at once:
+
+import numpy as np
+
+from .mortgages import calc_pmt, calc_balance
+
+
+class LoanBook(object):
+    """
+    Class for a book of fixed rate loans stored as arrays (one element
+    per loan) instead of one Mortgage instance per loan.
+
+    Parameters
+    ----------
+    loan_amount: array_like
+        Current loan amounts.
+    r_annual: array_like
+        Annual coupon interest rates.
+    years: array_like
+        Number of years remaining on each loan.
+    fv: array_like
+        Outstanding loan balances in the final period.
+        Assumes the loans will be fully paid off.
+    pts: array_like
+        Discount points paid directly to the lender.
+    """
+
+    def __init__(self, loan_amount, r_annual, years, fv=0.0, pts=0.0):
+        # Broadcast all inputs to one common length:
+        loan_amount, r_annual, years, fv, pts = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(loan_amount, dtype=float)),
+            np.asarray(r_annual, dtype=float),
+            np.asarray(years),
+            np.asarray(fv, dtype=float),
+            np.asarray(pts, dtype=float))
+
+        self.loan_amount = loan_amount
+        self.r_monthly = r_annual / 12.0
+        self.months = (years*12).astype(int)
+        self.fv = fv
+        self.pts = pts
+        self.pmt = calc_pmt(self.loan_amount, self.r_monthly,
+                            self.months, self.fv)
+        self.upfront = self.loan_amount * (self.pts/100.0)
+
+    def __len__(self):
+        return len(self.loan_amount)
+
+    def create_amortization_schedule(self):
+        """
+        Creates the amortization schedule of every loan in one
+        vectorized pass. Loans with shorter terms are padded with zeros
+        after their final payment.
+
+        Returns
+        -------
+        schedule: dict
+            2D arrays (loans x months + 1) for the balance, payment,
+            interest and principal.
+        """
+
+        # Set up the month grid for the longest loan:
+        month_i = np.arange(self.months.max()+1)
+        active = month_i <= self.months[:, np.newaxis]
+
+        # Calculate the balance for every loan and month:
+        balance = calc_balance(self.loan_amount[:, np.newaxis],
+                               self.r_monthly[:, np.newaxis],
+                               self.pmt[:, np.newaxis], month_i)
+        balance[~active] = 0.0
+
+        # Interest accrues on the previous month's balance:
+        interest = np.zeros_like(balance)
+        np.multiply(balance[:, :-1], self.r_monthly[:, np.newaxis],
+                    out=interest[:, 1:])
+
+        # Payment is level until the loan is paid off:
+        payment = np.where(active, self.pmt[:, np.newaxis], 0.0)
+        payment[:, 0] = 0.0
+        interest[~active] = 0.0
+
+        # Principal is the part of the payment that is not interest:
+        principal = payment - interest
+
+        schedule = {"balance": balance, "payment": payment,
+                    "interest": interest, "principal": principal}
+
+        return schedule
@@ -2,6 +2,9 @@
 
 import numpy as np
 
+from .instrumentation import instrument
+from .loanbook import LoanBook
+
 
 def calc_smm(coupon_rate, market_rates):
     """
@@ -57,6 +60,115 @@ def calc_cpr(smm):
     return cpr
 
 
+def calc_pool_cashflows(balance, payment, interest, smm,
+                        pool_factor=1.0):
+    """
+    Calculates the cash flows of a pooled mortgage given the
+    amortization schedule of the underlying loan and the SMM. Months
+    run along the last axis, so 2D inputs (loans or paths x months)
+    are pooled in one pass.
+
+    Parameters
+    ----------
+    balance: array_like
+        Scheduled balance of the underlying loan.
+    payment: array_like
+        Scheduled payment of the underlying loan.
+    interest: array_like
+        Scheduled interest of the underlying loan.
+    smm: array_like
+        Single monthly mortality rate for each month. The first month
+        is always treated as 0.
+    pool_factor: array_like
+        Initial pool factor (one value per row for 2D inputs).
+
+    Returns
+    -------
+    pooled: dict
+        Arrays for the smm, pool_factor, pool_balance, pool_pmt,
+        pool_interest, pool_principal, prepay_dollars,
+        total_principal and total_cashflow.
+    """
+
+    # Broadcast the inputs to a common shape:
+    balance, payment, interest, smm = np.broadcast_arrays(
+        balance, payment, interest, smm)
+    smm = smm.astype(float)
+    smm[..., 0] = 0.0
+
+    # Pool factor decreases over time given SMM:
+    pool_factor = np.asarray(pool_factor, dtype=float)[..., np.newaxis]
+    pool_factor = pool_factor * np.cumprod(1.0-smm, axis=-1)
+    pool_factor_shift = pool_factor[..., :-1]
+
+    # Scale the schedule by the pool factor:
+    pool_balance = balance * pool_factor
+    pool_pmt = np.zeros_like(pool_balance)
+    pool_pmt[..., 1:] = payment[..., 1:] * pool_factor_shift
+    pool_interest = np.zeros_like(pool_balance)
+    pool_interest[..., 1:] = interest[..., 1:] * pool_factor_shift
+    pool_principal = pool_pmt - pool_interest
+
+    # Prepaid principal is the SMM share of the balance left after the
+    # scheduled principal:
+    prepay_dollars = np.zeros_like(pool_balance)
+    prepay_dollars[..., 1:] = (pool_balance[..., :-1] -
+                               pool_principal[..., 1:])*smm[..., 1:]
+
+    total_principal = pool_principal + prepay_dollars
+    total_cashflow = pool_interest + total_principal
+
+    pooled = {"smm": smm, "pool_factor": pool_factor,
+              "pool_balance": pool_balance, "pool_pmt": pool_pmt,
+              "pool_interest": pool_interest,
+              "pool_principal": pool_principal,
+              "prepay_dollars": prepay_dollars,
+              "total_principal": total_principal,
+              "total_cashflow": total_cashflow}
+
+    return pooled
+
+
+def calc_wac_wam(pool_balance, pool_interest, weighted_months):
+    """
+    Calculates the weighted average coupon and weighted average
+    maturity of a pool of loans for every month.
+
+    Parameters
+    ----------
+    pool_balance: array_like
+        Aggregate pool balance for each month.
+    pool_interest: array_like
+        Aggregate pool interest for each month.
+    weighted_months: array_like
+        Sum over the loans of the original number of months times the
+        pool balance of the loan, for each month.
+
+    Returns
+    -------
+    wac: array_like
+        Weighted average annual coupon rate.
+    wam: array_like
+        Weighted average number of remaining months.
+    """
+
+    outstanding = pool_balance > 0.0
+
+    # WAC is the balance weighted coupon, i.e. next month's interest
+    # over this month's balance:
+    wac = np.zeros_like(pool_balance)
+    np.divide(12.0*pool_interest[1:], pool_balance[:-1], out=wac[:-1],
+              where=outstanding[:-1])
+
+    # WAM is the balance weighted number of remaining months:
+    month_i = np.arange(len(pool_balance))
+    wam = np.zeros_like(pool_balance)
+    np.divide(weighted_months, pool_balance, out=wam, where=outstanding)
+    wam = np.where(outstanding, wam - month_i, 0.0)
+
+    return wac, wam
+
+
 class Mbs(object):
     """
     Class for mortgage backed securities. Assumes one type of loan
@@ -81,7 +193,20 @@ class Mbs(object):
         self.smm = self.check_smm(smm)
         self.cpr = calc_cpr(self.smm)
         self.pool_factor = pool_factor
-        self.pooled = self.pool_mortgage()
+        self.cash_flows = self.calc_pool_arrays()
+        self._pooled = None
+
+    @property
+    def pooled(self):
+        """
+        Pooled mortgage as a pandas DataFrame. Built the first time it
+        is accessed.
+        """
+
+        if self._pooled is None:
+            self._pooled = self.pool_mortgage()
+
+        return self._pooled
 
     def check_smm(self, smm):
         """
@@ -104,56 +229,160 @@ class Mbs(object):
 
         return smm
 
+    def calc_pool_arrays(self):
+        """
+        Creates the pooled mortgage cash flows as NumPy arrays using the
+        instance's amortization schedule, SMM and pool factor.
+        """
+
+        schedule = self.mortgage.schedule
+
+        return calc_pool_cashflows(schedule["balance"],
+                                   schedule["payment"],
+                                   schedule["interest"], self.smm,
+                                   self.pool_factor)
+
+    @instrument
     def pool_mortgage(self):
         """
         Creates a pooled mortgage using the mortgage instance and
-        pool factor.
-        Uses the instance's amortization schedule and the SMM to
-        pull out prepaid principal.
-        """
-
-        # Make copy of the amortization schedule:
-        pooled = self.mortgage.amortization.copy()
-
-        # Add SMM and pool factor:
-        pooled["smm"] = self.smm.tolist()
-        pooled["smm"][0] = 0.0
-        pooled["pool_factor"] = self.pool_factor
-
-        # Create updated pool factor so that it decreases over time
-        # given SMM:
-        pooled["pool_factor_shift"] = pooled.pool_factor.shift(1)*(
-                1.0-pooled.smm)
-        pooled["pool_factor"] = np.cumprod(pooled.pool_factor_shift)
-        pooled["pool_factor"][0] = self.pool_factor
-        pooled = pooled.drop(columns=["pool_factor_shift"])
-
-        # Re-shift updated pool factor to adjust payment, interest,
-        # and principal:
-        pooled["pool_factor_shift"] = pooled.pool_factor.shift(1)
-        pooled["pool_balance"] = pooled.balance * pooled.pool_factor
-        pooled["pool_pmt"] = pooled.payment * pooled.pool_factor_shift
-        pooled["pool_interest"] = \
-            pooled.interest * pooled.pool_factor_shift
-        pooled["pool_principal"] = pooled.pool_pmt - \
-                                   pooled.pool_interest
-        pooled["prepay_dollars"] = ((pooled.pool_balance -
-                                     pooled.pool_principal.shift(
-                                         -1))*pooled.smm.shift(
-            -1)).shift(
-            1)
-        pooled["total_principal"] = pooled.pool_principal + \
-                                    pooled.prepay_dollars
-        pooled["total_cashflow"] = pooled.pool_interest + \
-                                   pooled.total_principal
-
-        # Fill NA with 0:
-        pooled = pooled.fillna(0)
-
-        # Subset to final columns:
-        pooled = pooled.loc[:, ["smm", "pool_factor", "pool_balance",
-                                "pool_pmt", "pool_interest",
-                                "pool_principal", "prepay_dollars",
-                                "total_principal", "total_cashflow"]]
+        pool factor and sets it in pandas DataFrame.
+        """
+
+        import pandas as pd
+
+        column_names = ["smm", "pool_factor", "pool_balance",
+                        "pool_pmt", "pool_interest", "pool_principal",
+                        "prepay_dollars", "total_principal",
+                        "total_cashflow"]
+        pooled = pd.DataFrame(self.cash_flows, columns=column_names)
+
+        return pooled
+
+
+class MbsPool(object):
+    """
+    Class for mortgage backed securities backed by many loans with
+    different coupons, terms and balances.
+
+    Parameters
+    ----------
+    loans: LoanBook or list of mortgage
+        Underlying loans that will be pooled together for the MBS.
+    smm: array_like
+        Single monthly mortality is the amount of principal on
+        mortgage-backed securities that is prepaid in a given month.
+        Must have either length one, length months + 1 of the longest
+        loan, or shape (loans, months + 1).
+    pool_factor: array_like
+        Amount of the initial principal of each underlying loan that
+        remains in a mortgage-backed security transaction.
+    """
+
+    def __init__(self, loans, smm, pool_factor=1.0):
+        self.schedule, self.months = self.stack_loans(loans)
+        self.smm = self.check_smm(smm)
+        self.cpr = calc_cpr(self.smm)
+        self.pool_factor = pool_factor
+        self.cash_flows = self.calc_pool_arrays()
+        self.wac = self.cash_flows["wac"][0]
+        self.wam = self.cash_flows["wam"][0]
+        self._pooled = None
+
+    @property
+    def pooled(self):
+        """
+        Aggregate pool cash flows as a pandas DataFrame. Built the
+        first time it is accessed.
+        """
+
+        if self._pooled is None:
+            self._pooled = self.pool_mortgage()
+
+        return self._pooled
+
+    @staticmethod
+    def stack_loans(loans):
+        """
+        Stacks the amortization schedules of the loans into 2D arrays
+        (loans x months + 1), padding shorter loans with zeros.
+        """
+
+        if isinstance(loans, LoanBook):
+            return loans.create_amortization_schedule(), loans.months
+
+        months = np.array([loan.months for loan in loans])
+        schedule = {}
+
+        for column in ["balance", "payment", "interest", "principal"]:
+            schedule[column] = np.zeros((len(loans), months.max()+1))
+            for i, loan in enumerate(loans):
+                schedule[column][i, :months[i]+1] = \
+                    loan.schedule[column]
+
+        return schedule, months
+
+    def check_smm(self, smm):
+        """
+        Checks whether smm is of the right type and shape.
+        """
+
+        smm = np.asarray(smm, dtype=float)
+        shape = self.schedule["balance"].shape
+
+        # Check if smm is a single value, one vector for all loans or
+        # one vector per loan:
+        if smm.size == 1:
+            smm = np.full(shape[1], smm.item())
+
+        if smm.shape not in [(shape[1],), shape]:
+            raise ValueError("smm must have length 1, length {} or "
+                             "shape {}".format(shape[1], shape))
+
+        return smm
+
+    def calc_pool_arrays(self):
+        """
+        Creates the aggregate pool cash flows, WAC and WAM as NumPy
+        arrays by pooling every loan in one batched pass.
+        """
+
+        loan_flows = calc_pool_cashflows(self.schedule["balance"],
+                                         self.schedule["payment"],
+                                         self.schedule["interest"],
+                                         self.smm, self.pool_factor)
+
+        # Sum the cash flows across loans:
+        cash_flows = {}
+        for column in ["pool_balance", "pool_pmt", "pool_interest",
+                       "pool_principal", "prepay_dollars",
+                       "total_principal", "total_cashflow"]:
+            cash_flows[column] = loan_flows[column].sum(axis=0)
+
+        # Share of the initial pool balance left, which unlike the
+        # prepayment pool_factor of Mbs also falls with the scheduled
+        # principal:
+        pool_balance = cash_flows["pool_balance"]
+        cash_flows["balance_factor"] = pool_balance / pool_balance[0]
+        cash_flows["wac"], cash_flows["wam"] = calc_wac_wam(
+            pool_balance, cash_flows["pool_interest"],
+            self.months @ loan_flows["pool_balance"])
+
+        return cash_flows
+
+    @instrument
+    def pool_mortgage(self):
+        """
+        Creates the aggregate pool cash flows and sets them in pandas
+        DataFrame.
+        """
+
+        import pandas as pd
+
+        column_names = ["balance_factor", "pool_balance", "pool_pmt",
+                        "pool_interest", "pool_principal",
+                        "prepay_dollars", "total_principal",
+                        "total_cashflow", "wac", "wam"]
+        pooled = pd.DataFrame(self.cash_flows, columns=column_names)
 
         return pooled
@@ -0,0 +1,149 @@
+# Class to calculate path-dependent MBS values with Monte Carlo:
+
+import numpy as np
+
+from .mbs import calc_smm, calc_pool_cashflows
+from .rootfinding import brent
+
+
+class MbsMonteCarlo(object):
+    """
+    Class for Monte Carlo valuation of a mortgage backed security whose
+    prepayments depend on the simulated short-rate path. All paths are
+    pooled and discounted in one vectorized pass.
+
+    Parameters
+    ----------
+    mortgage: mortgage
+        Instance of class mortgage that will be pooled together for
+        the MBS.
+    short_rates: array_like
+        Simulated annual short rates (months + 1 x paths), e.g. from
+        create_paths(dt=1/12, paths) of a short-rate model with
+        terminal_period equal to the years of the mortgage.
+    pool_factor: float
+        Amount of the initial principal of the underlying mortgage
+        loans that remain in a mortgage-backed security transaction.
+    coupon_rate: float
+        Annual coupon rate used in the prepayment model.
+        Defaults to the coupon rate of the mortgage.
+    """
+
+    def __init__(self, mortgage, short_rates, pool_factor=1.0,
+                 coupon_rate=None):
+        if coupon_rate is None:
+            coupon_rate = mortgage.r_monthly * 12.0
+
+        self.mortgage = mortgage
+        self.short_rates = self.check_short_rates(short_rates)
+        self.pool_factor = pool_factor
+        self.coupon_rate = coupon_rate
+        self.smm = calc_smm(coupon_rate, self.short_rates)
+        self.cash_flows = self.calc_path_cashflows()
+        self.remaining_rates = 1.0 + (self.short_rates[1:]/12.0)
+        self.path_values = self.calc_path_values()
+        self.market_value = np.mean(self.path_values)
+        self.std_error = self.calc_std_error()
+
+    def calc_std_error(self):
+        """
+        Calculates the Monte Carlo standard error of the market value.
+        NaN for a single path.
+        """
+
+        paths = len(self.path_values)
+        if paths < 2:
+            return np.nan
+
+        return np.std(self.path_values, ddof=1) / np.sqrt(paths)
+
+    def check_short_rates(self, short_rates):
+        """
+        Checks whether short_rates has one row per month of the
+        mortgage schedule.
+        """
+
+        short_rates = np.asarray(short_rates, dtype=float)
+
+        if short_rates.ndim == 1:
+            short_rates = short_rates[:, np.newaxis]
+
+        if short_rates.shape[0] != (self.mortgage.months+1):
+            raise ValueError("short_rates must have {} rows".format(
+                self.mortgage.months+1))
+
+        return short_rates
+
+    def calc_path_cashflows(self):
+        """
+        Calculates the total pool cash flow of every path (paths x
+        months + 1).
+        """
+
+        schedule = self.mortgage.schedule
+        pooled = calc_pool_cashflows(schedule["balance"],
+                                     schedule["payment"],
+                                     schedule["interest"], self.smm.T,
+                                     self.pool_factor)
+
+        return pooled["total_cashflow"]
+
+    def calc_path_values(self, spread=0.0):
+        """
+        Calculates the present value of the cash flows of every path,
+        discounting each path with its own short rates plus a constant
+        spread.
+
+        Parameters
+        ----------
+        spread: float
+            Annual spread added to every short rate.
+            Defaults to 0.
+
+        Returns
+        -------
+        path_values: array_like
+            Present value of the cash flows of every path.
+        """
+
+        # Calculate discount rates for every path (months x paths):
+        discount_rates = np.cumprod(
+            1.0/(self.remaining_rates + spread/12.0), axis=0)
+
+        # Sum the discounted cash flows of each path:
+        path_values = np.einsum("pk,kp->p", self.cash_flows[:, 1:],
+                                discount_rates)
+
+        return path_values
+
+    def calc_oas(self, price, lower=-0.1, upper=0.1, tolerance=1e-10):
+        """
+        Finds the option-adjusted spread, i.e. the constant spread over
+        the simulated short rates that reproduces the market price.
+        The path cash flows are reused and only the discounting is
+        repeated for each trial spread.
+
+        Parameters
+        ----------
+        price: float
+            Market price of the MBS.
+        lower: float
+            Lower bound for the spread.
+        upper: float
+            Upper bound for the spread.
+        tolerance: float
+            Tolerance criteria for the root finding algorithm.
+
+        Returns
+        -------
+        oas: float
+            Option-adjusted spread.
+        """
+
+        def price_error(spread):
+            return np.mean(self.calc_path_values(spread))/price - 1.0
+
+        optimal = brent(price_error, lower, upper,
+                        tolerance=tolerance)
+
+        return optimal.root_value
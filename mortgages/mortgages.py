@@ -1,7 +1,8 @@
 # Class to calculate mortgage payments/amortization:
 
 import numpy as np
-import pandas as pd
+
+from .instrumentation import instrument
 
 
 def calc_pmt(loan_amount, r_monthly, months, fv=0):
@@ -36,6 +37,144 @@ def calc_pmt(loan_amount, r_monthly, months, fv=0):
     return pmt
 
 
+def calc_pmt_derivatives(loan_amount, r_monthly, months, fv=0):
+    """
+    Finds the monthly payment on a loan and its first and second
+    derivatives with respect to the monthly coupon rate.
+
+    Parameters
+    ----------
+    loan_amount: array_like
+        Current loan amount.
+    r_monthly: array_like
+        Monthly coupon interest rate.
+    months: array_like
+        Number of months remaining on the loan.
+    fv: array_like
+        Outstanding loan balance in the final period.
+
+    Returns
+    -------
+    pmt: array_like
+        Monthly payment.
+    d_pmt: array_like
+        First derivative of the payment with respect to r_monthly.
+    d2_pmt: array_like
+        Second derivative of the payment with respect to r_monthly.
+    """
+
+    # Discount factor of the final period and its derivatives:
+    growth = 1.0 + r_monthly
+    discount = growth**-months
+    d_discount = -months * discount / growth
+    d2_discount = months * (months+1.0) * discount / growth**2
+
+    # Numerator r * pv and its derivatives:
+    pv = loan_amount + fv*discount
+    numerator = r_monthly * pv
+    d_numerator = pv + r_monthly*fv*d_discount
+    d2_numerator = 2.0*fv*d_discount + r_monthly*fv*d2_discount
+
+    # Denominator 1 - discount and its derivatives:
+    denominator = 1.0 - discount
+    d_denominator = -d_discount
+    d2_denominator = -d2_discount
+
+    # Quotient rule:
+    pmt = numerator / denominator
+    d_pmt = (d_numerator - pmt*d_denominator) / denominator
+    d2_pmt = (d2_numerator - 2.0*d_pmt*d_denominator -
+              pmt*d2_denominator) / denominator
+
+    return pmt, d_pmt, d2_pmt
+
+
+def calc_balance(loan_amount, r_monthly, pmt, month_i):
+    """
+    Finds the outstanding balance of a level payment loan after
+    month_i payments using the closed-form annuity formula.
+
+    Parameters
+    ----------
+    loan_amount: array_like
+        Original loan amount.
+    r_monthly: array_like
+        Monthly coupon interest rate.
+    pmt: array_like
+        Monthly payment.
+    month_i: array_like
+        Number of payments made.
+
+    Returns
+    -------
+    balance: array_like
+        Outstanding loan balance after month_i payments.
+    """
+
+    # Calculate the growth of one dollar over month_i months:
+    growth = (1.0+r_monthly)**month_i
+
+    # Accrue the loan amount and subtract the accrued payments:
+    balance = loan_amount*growth - pmt*(growth-1.0)/r_monthly
+
+    return balance
+
+
+def calc_amortization(loan_amount, r_monthly, months, pmt, out=None):
+    """
+    Creates the full amortization schedule of a level payment loan in
+    one pass using the closed-form annuity balance formula.
+
+    Parameters
+    ----------
+    loan_amount: float
+        Original loan amount.
+    r_monthly: float
+        Monthly coupon interest rate.
+    months: int
+        Number of months remaining on the loan.
+    pmt: float
+        Monthly payment.
+    out: array_like
+        Array (4 x months + 1) that the balance, payment, interest and
+        principal rows are written into.
+        Defaults to new arrays.
+
+    Returns
+    -------
+    schedule: dict
+        Arrays of length months + 1 for the balance, payment, interest
+        and principal. The first element is the state before any
+        payment is made. Rows of out if it is given.
+    """
+
+    if out is None:
+        out = np.empty((4, months+1))
+
+    balance, payment, interest, principal = out
+
+    # Calculate the balance for every month:
+    balance[:] = calc_balance(loan_amount, r_monthly, pmt,
+                              np.arange(months+1))
+
+    # Interest accrues on the previous month's balance:
+    interest[0] = 0.0
+    np.multiply(balance[:-1], r_monthly, out=interest[1:])
+
+    # Payment is level after the first month:
+    payment[:] = pmt
+    payment[0] = 0.0
+
+    # Principal is the part of the payment that is not interest:
+    np.subtract(payment, interest, out=principal)
+    principal[0] = 0.0
+
+    schedule = {"balance": balance, "payment": payment,
+                "interest": interest, "principal": principal}
+
+    return schedule
+
+
 def calc_market_value(cash_flow, market_rates, month_i=1):
     """
     Calculates the market value of the mortgage using current risk-free
@@ -69,21 +208,148 @@ def calc_market_value(cash_flow, market_rates, month_i=1):
                          "length.")
 
     # Subset cash_flow:
-    remaining_payments = cash_flow[month_i:]
-
-    # Get remaining market rates:
-    remaining_rates = 1.0 + (np.array(market_rates)[month_i:]/12.0)
+    remaining_payments = np.asarray(cash_flow)[month_i:]
 
     # Calculate discount rates:
-    discount_rates = np.cumprod(1.0/remaining_rates)
+    discount_rates = calc_discount_factors(market_rates, month_i)
 
     # Calculate sum of the present value of the payments from month_i
     # to terminal month:
-    market_value = sum(remaining_payments*discount_rates)
+    market_value = np.dot(remaining_payments, discount_rates)
 
     return market_value
 
 
+def calc_discount_factors(market_rates, month_i=1):
+    """
+    Calculates the cumulative monthly discount factors from month_i to
+    the terminal month for one or many paths of market rates.
+
+    Parameters
+    ----------
+    market_rates: array_like
+        Annual risk-free interest rates, either one vector of months
+        + 1 rates or a (months + 1 x paths) matrix.
+    month_i: int
+        Current month.
+        Defaults to first payment month.
+
+    Returns
+    -------
+    discount_rates: array_like
+        Discount factors (months + 1 - month_i, or months + 1 - month_i
+        x paths).
+    """
+
+    # Get remaining market rates:
+    market_rates = np.asarray(market_rates, dtype=float)
+    discount_rates = market_rates[month_i:] / 12.0
+    discount_rates += 1.0
+
+    # Calculate discount rates in place:
+    np.reciprocal(discount_rates, out=discount_rates)
+    np.cumprod(discount_rates, axis=0, out=discount_rates)
+
+    return discount_rates
+
+
+def calc_market_value_paths(cash_flow, market_rates=None,
+                            discount_factors=None, month_i=1):
+    """
+    Calculates the market value of one or many cash flow vectors under
+    many paths of risk-free interest rates as one matrix product.
+
+    Parameters
+    ----------
+    cash_flow: array_like
+        Array of future cash flows (months + 1), or 2D array with one
+        row of cash flows per security (securities x months + 1).
+    market_rates: array_like
+        Annual risk-free interest rates (months + 1 x paths).
+        Not needed if discount_factors is given.
+    discount_factors: array_like
+        Precomputed discount factors from calc_discount_factors
+        (months + 1 - month_i x paths).
+    month_i: int
+        Current month.
+        Defaults to first payment month.
+
+    Returns
+    -------
+    market_value: array_like
+        Market value of each cash flow vector under each path (paths,
+        or securities x paths).
+    """
+
+    cash_flow = np.asarray(cash_flow)
+
+    if discount_factors is None:
+        if market_rates is None:
+            raise ValueError("Either market_rates or discount_factors "
+                             "must be given.")
+
+        # Make sure cash_flow and market_rates cover the same months:
+        if cash_flow.shape[-1] != len(market_rates):
+            raise ValueError("cash_flow and market_rates are not the "
+                             "same length.")
+
+        discount_factors = calc_discount_factors(market_rates, month_i)
+
+    # Make sure the discount factors cover the remaining payments:
+    if (cash_flow.shape[-1] - month_i) != len(discount_factors):
+        raise ValueError("discount_factors must have {} rows".format(
+            cash_flow.shape[-1] - month_i))
+
+    # Discount every cash flow vector under every path:
+    market_value = cash_flow[..., month_i:] @ discount_factors
+
+    return market_value
+
+
+def calc_market_value_derivatives(cash_flow, yield_annual, month_i=1):
+    """
+    Calculates the market value of the cash flows discounted at a
+    constant annual yield and its first and second derivatives with
+    respect to the yield. Uses the same monthly discounting as
+    calc_market_value.
+
+    Parameters
+    ----------
+    cash_flow: array_like
+        Array of future cash flows (or 2D array with one row per
+        problem).
+    yield_annual: array_like
+        Annual yield used for discounting (one per row).
+    month_i: int
+        Current month.
+
+    Returns
+    -------
+    market_value: array_like
+        Market value of future cash flows.
+    d_market_value: array_like
+        First derivative of the market value.
+    d2_market_value: array_like
+        Second derivative of the market value.
+    """
+
+    # Subset cash_flow:
+    remaining_payments = np.asarray(cash_flow, dtype=float)[...,
+                                                            month_i:]
+    k = np.arange(1, remaining_payments.shape[-1]+1)
+
+    # Calculate discounted payments:
+    growth = 1.0 + np.asarray(yield_annual, dtype=float)/12.0
+    discounted = remaining_payments * \
+        growth[..., np.newaxis]**-k.astype(float)
+
+    market_value = discounted.sum(axis=-1)
+    d_market_value = -(discounted @ k) / (12.0*growth)
+    d2_market_value = (discounted @ (k*(k+1.0))) / (144.0*growth**2)
+
+    return market_value, d_market_value, d2_market_value
+
+
 def calc_wal(cash_flow, original_balance):
     """
     Finds the weighted average life of the loan.
@@ -108,7 +374,7 @@ def calc_wal(cash_flow, original_balance):
     n = len(cash_flow)
 
     # Calculate WAL:
-    wal = sum(cash_flow*list(range(n))) / original_balance
+    wal = np.dot(cash_flow, np.arange(n)) / original_balance
 
     return wal
 
@@ -144,8 +410,81 @@ class Mortgage(object):
         self.vec_balance = [loan_amount]
         self.pmt = calc_pmt(loan_amount, self.r_monthly, self.months,
                             self.fv)
-        self.amortization = self.create_amortization_schedule()
         self.upfront = loan_amount * (pts/100.0)
+        self._schedule = None
+        self._amortization = None
+
+    @property
+    def schedule(self):
+        """
+        Amortization schedule as NumPy arrays. Built the first time it
+        is accessed.
+        """
+
+        if self._schedule is None:
+            self._schedule = self.create_amortization_arrays()
+
+        return self._schedule
+
+    @property
+    def amortization(self):
+        """
+        Amortization schedule as a pandas DataFrame. Built the first
+        time it is accessed.
+        """
+
+        if self._amortization is None:
+            self._amortization = self.create_amortization_schedule()
+
+        return self._amortization
+
+    def check_month(self, month_i):
+        """
+        Check whether month_i is between 0 and the terminal month.
+        """
+
+        if np.any((np.asarray(month_i) < 0) |
+                  (np.asarray(month_i) > self.months)):
+            raise ValueError("month_i must be between 0 and "
+                             "{}".format(self.months))
+
+    def calc_month(self, month_i):
+        """
+        Finds the balance, interest and principal for a month without
+        building the amortization schedule.
+
+        Parameters
+        ----------
+        month_i: array_like
+            Month of the schedule.
+            Must be between 0 and terminal month.
+
+        Returns
+        -------
+        balance: array_like
+            Outstanding loan balance after the payment in month_i.
+        interest: array_like
+            Interest paid in month_i.
+        principal: array_like
+            Principal paid in month_i.
+        """
+
+        self.check_month(month_i)
+        month_i = np.asarray(month_i)
+
+        # Find the balance before and after the payment:
+        balance = calc_balance(self.loan_amount, self.r_monthly,
+                               self.pmt, month_i)
+        previous_balance = calc_balance(self.loan_amount,
+                                        self.r_monthly, self.pmt,
+                                        np.maximum(month_i, 1) - 1)
+
+        # No payment is made in the first month of the schedule:
+        interest = np.where(month_i == 0, 0.0,
+                            previous_balance*self.r_monthly)
+        principal = np.where(month_i == 0, 0.0, self.pmt - interest)
+
+        return balance[()], interest[()], principal[()]
 
     def update_loan(self, month_i):
         """
@@ -172,23 +511,42 @@ class Mortgage(object):
         else:
             print(self.months, "payments were already made.")
 
-    def create_amortization_schedule(self):
+    @instrument
+    def create_amortization_arrays(self):
         """
-        Creates full amortization schedule and sets it in pandas
-        DataFrame.
+        Creates full amortization schedule as NumPy arrays by looping
+        through every payment.
+
+        Returns
+        -------
+        schedule: dict
+            Arrays for the balance, payment, interest and principal.
         """
 
         # Loop through all payments:
         for m in range(self.months):
             self.update_loan(m)
 
+        schedule = {"balance": np.array(self.vec_balance),
+                    "payment": np.array(self.vec_pmt),
+                    "interest": np.array(self.vec_int),
+                    "principal": np.array(self.vec_principal)}
+
+        return schedule
+
+    @instrument
+    def create_amortization_schedule(self):
+        """
+        Creates full amortization schedule and sets it in pandas
+        DataFrame.
+        """
+
+        # Import pandas only when a DataFrame is needed:
+        import pandas as pd
+
         # Create pandas DataFrame:
         column_names = ["balance", "payment", "interest", "principal"]
-        amortization = pd.DataFrame(list(zip(self.vec_balance,
-                                             self.vec_pmt,
-                                             self.vec_int,
-                                             self.vec_principal)),
-                                    columns=column_names)
+        amortization = pd.DataFrame(self.schedule, columns=column_names)
 
         return amortization
 
@@ -215,6 +573,30 @@ class Fixed(Mortgage):
     def __init__(self, loan_amount, r_annual, years, fv=0.0, pts=0.0):
         Mortgage.__init__(self, loan_amount, r_annual, years, fv, pts)
 
+    @instrument
+    def create_amortization_arrays(self):
+        """
+        Creates full amortization schedule as NumPy arrays using the
+        closed-form annuity balance formula instead of the monthly
+        loop.
+
+        Returns
+        -------
+        schedule: dict
+            Arrays for the balance, payment, interest and principal.
+        """
+
+        schedule = calc_amortization(self.loan_amount, self.r_monthly,
+                                     self.months, self.pmt)
+
+        # Keep the monthly vectors in sync with the schedule:
+        self.vec_balance = schedule["balance"].tolist()
+        self.vec_pmt = schedule["payment"].tolist()
+        self.vec_int = schedule["interest"].tolist()
+        self.vec_principal = schedule["principal"].tolist()
+
+        return schedule
+
 
 class Adjustable(Mortgage):
     """
@@ -244,8 +626,140 @@ class Adjustable(Mortgage):
                  years_teaser, fv=0.0, pts=0.0):
         self.months_teaser = years_teaser * 12
         self.next_r = self.check_r_annual(r_annual, years) / 12.0
+        self.r_teaser = r_teaser / 12.0
         Mortgage.__init__(self, loan_amount, r_teaser, years, fv, pts)
 
+        # Set the payment and rate of the final reset, like the
+        # monthly loop that used to run here:
+        starts, rates, pmts, balances = self.create_reset_segments()
+        self.pmt = pmts[-1]
+        self.r_monthly = rates[-1]
+
+    def create_reset_segments(self):
+        """
+        Splits the loan into segments with a constant coupon rate. The
+        payment is only recalculated at the start of each segment.
+
+        Returns
+        -------
+        starts: array_like
+            Month in which each segment starts.
+        rates: array_like
+            Monthly coupon interest rate of each segment.
+        pmts: array_like
+            Monthly payment of each segment.
+        balances: array_like
+            Outstanding loan balance at the start of each segment.
+        """
+
+        # Find the months where the rate after the teaser changes:
+        next_r = np.ones(self.months-self.months_teaser) * self.next_r
+        changes = np.flatnonzero(np.diff(next_r)) + 1
+        run_starts = np.concatenate(([0], changes))[:len(next_r)]
+
+        # Add the teaser period as the first segment:
+        starts = self.months_teaser + run_starts
+        rates = next_r[run_starts]
+        if self.months_teaser > 0:
+            starts = np.concatenate(([0], starts))
+            rates = np.concatenate(([self.r_teaser], rates))
+
+        # Walk through the segments to find the balance and payment at
+        # each reset:
+        pmts = np.zeros(len(starts))
+        balances = np.zeros(len(starts))
+        balance = self.loan_amount
+
+        for i in range(len(starts)):
+            if (i == 0) and (self.months_teaser > 0):
+                pmt = calc_pmt(self.loan_amount, self.r_teaser,
+                               self.months, self.fv)
+            else:
+                pmt = calc_pmt(balance, rates[i],
+                               self.months - starts[i])
+
+            pmts[i] = pmt
+            balances[i] = balance
+
+            if i < (len(starts)-1):
+                balance = calc_balance(balance, rates[i], pmt,
+                                       starts[i+1] - starts[i])
+
+        return starts, rates, pmts, balances
+
+    def calc_month(self, month_i):
+        """
+        Finds the balance, interest and principal for a month without
+        building the amortization schedule.
+
+        Parameters
+        ----------
+        month_i: array_like
+            Month of the schedule.
+            Must be between 0 and terminal month.
+
+        Returns
+        -------
+        balance: array_like
+            Outstanding loan balance after the payment in month_i.
+        interest: array_like
+            Interest paid in month_i.
+        principal: array_like
+            Principal paid in month_i.
+        """
+
+        self.check_month(month_i)
+
+        starts, rates, pmts, balances = self.create_reset_segments()
+
+        # Find the segment that each payment falls into:
+        month_i = np.asarray(month_i)
+        seg = np.searchsorted(starts, np.maximum(month_i, 1) - 1,
+                              side="right") - 1
+        elapsed = month_i - starts[seg]
+
+        # Find the balance before and after the payment:
+        balance = calc_balance(balances[seg], rates[seg], pmts[seg],
+                               elapsed)
+        previous_balance = calc_balance(balances[seg], rates[seg],
+                                        pmts[seg], elapsed - 1)
+
+        # No payment is made in the first month of the schedule:
+        interest = np.where(month_i == 0, 0.0,
+                            previous_balance*rates[seg])
+        principal = np.where(month_i == 0, 0.0, pmts[seg] - interest)
+
+        return balance[()], interest[()], principal[()]
+
+    @instrument
+    def create_amortization_arrays(self):
+        """
+        Creates full amortization schedule as NumPy arrays by computing
+        each constant-rate segment in closed form instead of the
+        monthly loop.
+
+        Returns
+        -------
+        schedule: dict
+            Arrays for the balance, payment, interest and principal.
+        """
+
+        balance, interest, principal = self.calc_month(
+            np.arange(self.months+1))
+
+        schedule = {"balance": balance,
+                    "payment": interest + principal,
+                    "interest": interest,
+                    "principal": principal}
+
+        # Keep the monthly vectors in sync with the schedule:
+        self.vec_balance = schedule["balance"].tolist()
+        self.vec_pmt = schedule["payment"].tolist()
+        self.vec_int = schedule["interest"].tolist()
+        self.vec_principal = schedule["principal"].tolist()
+
+        return schedule
+
     def check_r_annual(self, r_annual, years):
         """
         Check whether r_annual is either length 1 or length (
@@ -280,6 +794,13 @@ class Adjustable(Mortgage):
             Current month
         """
 
+        # Start from the teaser payment and rate, since they are set to
+        # the final reset after __init__:
+        if (len(self.vec_pmt) == 1) and (self.months_teaser > 0):
+            self.r_monthly = self.r_teaser
+            self.pmt = calc_pmt(self.loan_amount, self.r_teaser,
+                                self.months, self.fv)
+
         if len(self.vec_pmt) >= (self.months_teaser + 1):
             self.r_monthly = self.next_r[month_i - self.months_teaser]
             self.pmt = calc_pmt(loan_amount=self.vec_balance[-1],
@@ -287,3 +808,134 @@ class Adjustable(Mortgage):
                                 months=self.months - month_i)
 
         Mortgage.update_loan(self, month_i)
+
+
+class CompactMortgage(object):
+    """
+    Class for a compact fixed rate mortgage. Uses __slots__ instead of
+    an instance dict and keeps the amortization schedule in one
+    contiguous array (4 x months + 1) with the balance, payment,
+    interest and principal rows, instead of monthly lists and a
+    DataFrame. The array is only allocated when the schedule is first
+    needed, so many loans can be held in memory at once.
+
+    Parameters
+    ----------
+    loan_amount: float
+        Current loan amount.
+    r_annual: float
+        Annual coupon interest rate.
+    years: int
+        Number of years remaining on the loan.
+    fv: float
+        Outstanding loan balance in the final period.
+        Assumes the loan will be fully paid off.
+    pts: float
+        Discount points paid directly to the lender.
+    dtype: dtype
+        Float type of the schedule, float64 or float32.
+        Defaults to float64.
+    """
+
+    __slots__ = ("loan_amount", "r_monthly", "months", "fv", "pts",
+                 "pmt", "upfront", "dtype", "buffer")
+
+    column_names = ("balance", "payment", "interest", "principal")
+
+    def __init__(self, loan_amount, r_annual, years, fv=0.0, pts=0.0,
+                 dtype=np.float64):
+        self.loan_amount = loan_amount
+        self.r_monthly = r_annual / 12.0
+        self.months = years * 12
+        self.fv = fv
+        self.pts = pts
+        self.pmt = calc_pmt(loan_amount, self.r_monthly, self.months,
+                            self.fv)
+        self.upfront = loan_amount * (pts/100.0)
+        self.dtype = np.dtype(dtype)
+        self.buffer = None
+
+    @property
+    def schedule(self):
+        """
+        Amortization schedule as read-only views on the rows of the
+        buffer. The buffer is built the first time it is accessed.
+        """
+
+        if self.buffer is None:
+            self.buffer = self.create_buffer()
+
+        return dict(zip(self.column_names, self.buffer))
+
+    @property
+    def amortization(self):
+        """
+        Amortization schedule as a pandas DataFrame that shares memory
+        with the buffer. Built on every access, which is cheap since
+        no data is copied. The DataFrame is read-only like the buffer;
+        use its copy method to modify it.
+        """
+
+        return self.create_amortization_schedule()
+
+    def create_buffer(self):
+        """
+        Allocates the buffer and fills it with the amortization
+        schedule in closed form.
+
+        Returns
+        -------
+        buffer: array_like
+            Read-only array (4 x months + 1) with the balance, payment,
+            interest and principal rows.
+        """
+
+        buffer = np.empty((4, self.months+1), dtype=self.dtype)
+        calc_amortization(self.loan_amount, self.r_monthly, self.months,
+                          self.pmt, out=buffer)
+        buffer.setflags(write=False)
+
+        return buffer
+
+    def calc_month(self, month_i):
+        """
+        Finds the balance, interest and principal for a month without
+        building the amortization schedule. See Mortgage.calc_month.
+        """
+
+        return Mortgage.calc_month(self, month_i)
+
+    def check_month(self, month_i):
+        """
+        Check whether month_i is between 0 and the terminal month.
+        """
+
+        Mortgage.check_month(self, month_i)
+
+    def release(self):
+        """
+        Frees the buffer. It is rebuilt when the schedule is next
+        needed.
+        """
+
+        self.buffer = None
+
+    @instrument
+    def create_amortization_schedule(self):
+        """
+        Creates the amortization schedule as a pandas DataFrame without
+        copying the buffer.
+        """
+
+        # Import pandas only when a DataFrame is needed:
+        import pandas as pd
+
+        # The transpose of the buffer is a (months + 1 x 4) view:
+        if self.buffer is None:
+            self.buffer = self.create_buffer()
+
+        amortization = pd.DataFrame(self.buffer.T,
+                                    columns=list(self.column_names),
+                                    copy=False)
+
+        return amortization
@@ -0,0 +1,306 @@
+# Functions to run a loan tape that does not fit in memory through the
+# amortization and pooling one chunk of loans at a time:
+
+import numpy as np
+
+from .analytics import calc_wal_batch
+from .loanbook import LoanBook
+from .mbs import calc_pool_cashflows, calc_wac_wam
+
+loan_fields = ("loan_amount", "r_annual", "years", "fv", "pts")
+
+
+def check_columns(columns=None):
+    """
+    Maps the LoanBook arguments to the column names of the tape.
+
+    Parameters
+    ----------
+    columns: dict
+        Column name of the tape for some of loan_amount, r_annual,
+        years, fv and pts. Missing ones use the argument name.
+
+    Returns
+    -------
+    columns: dict
+        Column name of the tape for every argument.
+    """
+
+    columns = dict(columns or {})
+
+    for field in columns:
+        if field not in loan_fields:
+            raise ValueError("columns must be some of "
+                             "{}".format(loan_fields))
+
+    return {field: columns.get(field, field) for field in loan_fields}
+
+
+def read_csv_chunks(filename, chunk_size=10000, columns=None):
+    """
+    Reads a CSV loan tape in chunks of rows with pandas.
+
+    Parameters
+    ----------
+    filename: str
+        Path of the CSV file.
+    chunk_size: int
+        Number of loans per chunk.
+        Defaults to 10000.
+    columns: dict
+        Column names of the tape. See check_columns. The fv and pts
+        columns are optional.
+
+    Yields
+    ------
+    chunk: dict
+        Arrays of the LoanBook arguments for the loans of the chunk.
+    """
+
+    # Import pandas only when a CSV tape is read:
+    import pandas as pd
+
+    columns = check_columns(columns)
+    names = set(columns.values())
+
+    with pd.read_csv(filename, chunksize=chunk_size,
+                     usecols=lambda x: x in names) as reader:
+        for frame in reader:
+            for field in loan_fields[:3]:
+                if columns[field] not in frame:
+                    raise ValueError("the tape has no column "
+                                     "{}".format(columns[field]))
+
+            yield {field: frame[column].to_numpy() for field, column in
+                   columns.items() if column in frame}
+
+
+def read_npy_chunks(filenames, chunk_size=10000):
+    """
+    Reads a loan tape stored as one .npy file per column in chunks of
+    rows. The files are memory-mapped, so only the rows of the current
+    chunk are read.
+
+    Parameters
+    ----------
+    filenames: dict
+        Path of the .npy file for loan_amount, r_annual, years and
+        optionally fv and pts.
+    chunk_size: int
+        Number of loans per chunk.
+        Defaults to 10000.
+
+    Yields
+    ------
+    chunk: dict
+        Arrays of the LoanBook arguments for the loans of the chunk.
+    """
+
+    for field in loan_fields[:3]:
+        if field not in filenames:
+            raise ValueError("filenames must include {}".format(field))
+
+    arrays = {field: np.load(filenames[field], mmap_mode="r") for
+              field in loan_fields if field in filenames}
+
+    loans = len(arrays["loan_amount"])
+    if any(len(array) != loans for array in arrays.values()):
+        raise ValueError("every column must have the same length")
+
+    for start in range(0, loans, chunk_size):
+        yield {field: np.array(array[start:start+chunk_size]) for
+               field, array in arrays.items()}
+
+
+def calc_chunk_cashflows(chunk):
+    """
+    Creates the amortization schedules of a chunk of loans and sums
+    them across loans.
+
+    Parameters
+    ----------
+    chunk: dict
+        Arrays of the LoanBook arguments.
+
+    Returns
+    -------
+    totals: dict
+        Arrays (max months + 1) for the summed balance, payment and
+        interest, and the sum of the number of months times the
+        balance (weighted_months) used for the WAM.
+    loan_results: dict
+        Arrays for the pmt, upfront, total_interest and wal (in
+        months) of every loan.
+    """
+
+    book = LoanBook(**chunk)
+    schedule = book.create_amortization_schedule()
+
+    totals = {"balance": schedule["balance"].sum(axis=0),
+              "payment": schedule["payment"].sum(axis=0),
+              "interest": schedule["interest"].sum(axis=0),
+              "weighted_months": book.months @ schedule["balance"]}
+
+    loan_results = {"pmt": book.pmt, "upfront": book.upfront,
+                    "total_interest": schedule["interest"].sum(axis=1),
+                    "wal": calc_wal_batch(schedule["principal"],
+                                          book.loan_amount)}
+
+    return totals, loan_results
+
+
+def add_totals(totals, chunk_totals):
+    """
+    Adds the totals of a chunk to the running totals in place, growing
+    the running totals if the chunk has longer loans.
+
+    Returns
+    -------
+    totals: dict
+        Running totals.
+    """
+
+    if totals is None:
+        return chunk_totals
+
+    months = len(chunk_totals["balance"])
+
+    for column, total in totals.items():
+        if len(total) < months:
+            total = np.concatenate((total,
+                                    np.zeros(months - len(total))))
+            totals[column] = total
+        total[:months] += chunk_totals[column]
+
+    return totals
+
+
+def write_loan_results(file, loan_results, start):
+    """
+    Appends the results of a chunk of loans to an open CSV file.
+
+    Parameters
+    ----------
+    file: file
+        CSV file opened for writing.
+    loan_results: dict
+        Arrays for the pmt, upfront, total_interest and wal.
+    start: int
+        Row of the tape of the first loan of the chunk.
+    """
+
+    columns = ["pmt", "upfront", "total_interest", "wal"]
+    loan = np.arange(start, start + len(loan_results["pmt"]))
+
+    if start == 0:
+        file.write(",".join(["loan"] + columns) + "\n")
+
+    np.savetxt(file, np.column_stack(
+        [loan] + [loan_results[column] for column in columns]),
+        delimiter=",", fmt=["%d"] + ["%.17g"]*len(columns))
+
+
+def write_pool_cashflows(cash_flows, filename):
+    """
+    Writes the monthly pool cash flows to a CSV file with one row per
+    month.
+
+    Parameters
+    ----------
+    cash_flows: dict
+        Arrays returned by run_tape.
+    filename: str
+        Path of the CSV file.
+    """
+
+    columns = list(cash_flows)
+    month_i = np.arange(len(cash_flows[columns[0]]))
+
+    np.savetxt(filename, np.column_stack(
+        [month_i] + [cash_flows[column] for column in columns]),
+        delimiter=",", fmt=["%d"] + ["%.17g"]*len(columns),
+        header=",".join(["month"] + columns), comments="")
+
+
+def run_tape(chunks, smm=0.0, pool_factor=1.0, loan_output=None):
+    """
+    Runs a loan tape through the amortization and pooling one chunk at
+    a time. Memory grows with the chunk size and the longest term, not
+    with the number of loans. Gives the same pool cash flows as
+    MbsPool on a LoanBook of the whole tape.
+
+    Parameters
+    ----------
+    chunks: iterable
+        Chunks of the tape, e.g. from read_csv_chunks or
+        read_npy_chunks.
+    smm: array_like
+        Single monthly mortality rate, either one value or one value
+        for each month of the longest loan (months + 1). The same
+        rates apply to every loan.
+    pool_factor: float
+        Initial pool factor.
+    loan_output: str
+        Path of a CSV file that the results of every loan are written
+        to chunk by chunk. See write_loan_results.
+        Defaults to no file.
+
+    Returns
+    -------
+    cash_flows: dict
+        Arrays for the balance_factor, pool_balance, pool_pmt,
+        pool_interest, pool_principal, prepay_dollars,
+        total_principal, total_cashflow, wac and wam of the whole
+        pool, like MbsPool.
+    """
+
+    totals = None
+    loans = 0
+    file = open(loan_output, "w") if loan_output else None
+
+    try:
+        for chunk in chunks:
+            chunk_totals, loan_results = calc_chunk_cashflows(chunk)
+            totals = add_totals(totals, chunk_totals)
+
+            if file is not None:
+                write_loan_results(file, loan_results, loans)
+
+            loans += len(loan_results["pmt"])
+    finally:
+        if file is not None:
+            file.close()
+
+    if totals is None:
+        raise ValueError("the tape has no loans")
+
+    # Check the smm against the longest loan:
+    months = len(totals["balance"])
+    smm = np.asarray(smm, dtype=float)
+    if smm.size == 1:
+        smm = np.full(months, smm.item())
+
+    if smm.shape != (months,):
+        raise ValueError("smm must have length 1 or length "
+                         "{}".format(months))
+
+    # Pooling is linear in the schedule when every loan has the same
+    # smm, so the summed schedule can be pooled once:
+    loan_flows = calc_pool_cashflows(totals["balance"],
+                                     totals["payment"],
+                                     totals["interest"], smm,
+                                     pool_factor)
+
+    cash_flows = {}
+    for column in ["pool_balance", "pool_pmt", "pool_interest",
+                   "pool_principal", "prepay_dollars",
+                   "total_principal", "total_cashflow"]:
+        cash_flows[column] = loan_flows[column]
+
+    pool_balance = cash_flows["pool_balance"]
+    cash_flows["balance_factor"] = pool_balance / pool_balance[0]
+    cash_flows["wac"], cash_flows["wam"] = calc_wac_wam(
+        pool_balance, cash_flows["pool_interest"],
+        loan_flows["pool_factor"]*totals["weighted_months"])
+
+    return cash_flows
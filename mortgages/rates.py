@@ -1,7 +1,77 @@
 # Class to setup interest rates under different short rate models:
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import numpy as np
 
+from .instrumentation import instrument
+
+
+class AffineCoefficientCache(object):
+    """
+    Class for a least-recently-used cache of affine term structure
+    coefficients keyed by the model parameters and the maturity grid.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of maturity grids kept in the cache.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.coefficients = OrderedDict()
+
+    def get(self, key, calc_coefficients, time_diff):
+        """
+        Looks up the coefficients for key, calculating and storing
+        them with calc_coefficients(time_diff) if they are missing.
+        The returned arrays are read-only.
+        """
+
+        if key in self.coefficients:
+            self.hits += 1
+            self.coefficients.move_to_end(key)
+            return self.coefficients[key]
+
+        self.misses += 1
+        coefficients = tuple(np.asarray(x) for x in
+                             calc_coefficients(time_diff))
+        for x in coefficients:
+            x.setflags(write=False)
+
+        self.coefficients[key] = coefficients
+        if len(self.coefficients) > self.maxsize:
+            self.coefficients.popitem(last=False)
+
+        return coefficients
+
+    def info(self):
+        """
+        Returns the cache statistics.
+        """
+
+        return {"hits": self.hits, "misses": self.misses,
+                "maxsize": self.maxsize,
+                "currsize": len(self.coefficients)}
+
+    def clear(self):
+        """
+        Removes every entry and resets the statistics.
+        """
+
+        self.coefficients.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared cache used by every short-rate model:
+affine_cache = AffineCoefficientCache()
+
 
 def calc_forward_rate(price_t1, price_t2, time_difference):
     """
@@ -30,7 +100,36 @@ def calc_forward_rate(price_t1, price_t2, time_difference):
     return forward_rate
 
 
-def create_wiener(time_steps, paths):
+def check_random_state(random_state=None):
+    """
+    Turns random_state into a random number generator.
+
+    Parameters
+    ----------
+    random_state: None, int, SeedSequence, Generator or RandomState
+        None gives the legacy generator seeded with 123. An int or a
+        SeedSequence seeds a new numpy.random.Generator. Generators
+        are used as they are.
+
+    Returns
+    -------
+    random_state: Generator or RandomState
+        Random number generator.
+    """
+
+    if random_state is None:
+        return np.random.RandomState(123)
+
+    if isinstance(random_state, (np.random.Generator,
+                                 np.random.RandomState)):
+        return random_state
+
+    return np.random.default_rng(random_state)
+
+
+@instrument
+def create_wiener(time_steps, paths, random_state=None,
+                  dtype=np.float64):
     """
     Creates random variables using a standard normal distribution.
 
@@ -40,6 +139,12 @@ def create_wiener(time_steps, paths):
         Total number of time steps.
     paths: int
         Total number of paths.
+    random_state: None, int, SeedSequence, Generator or RandomState
+        Source of the random numbers. See check_random_state.
+        Defaults to the legacy generator seeded with 123.
+    dtype: dtype
+        Float type of the random variables.
+        Defaults to float64.
 
     Returns
     -------
@@ -47,15 +152,259 @@ def create_wiener(time_steps, paths):
         Array of standard normal random variables
     """
 
-    # Set seed:
-    np.random.seed(123)
-
     # Get standard normal random variables:
-    dw = np.random.randn(time_steps, paths)
+    dw = next(iterate_wiener(time_steps, paths, random_state, dtype))[1]
 
     return dw
 
 
+def iterate_wiener(time_steps, paths, random_state=None,
+                   dtype=np.float64, block_size=None):
+    """
+    Creates random variables using a standard normal distribution in
+    blocks of time steps. The random numbers are drawn in the same
+    order as create_wiener, so the result does not depend on
+    block_size.
+
+    Parameters
+    ----------
+    time_steps: int
+        Total number of time steps.
+    paths: int
+        Total number of paths.
+    random_state: None, int, SeedSequence, Generator or RandomState
+        Source of the random numbers. See check_random_state.
+        Defaults to the legacy generator seeded with 123.
+    dtype: dtype
+        Float type of the random variables.
+        Defaults to float64.
+    block_size: int
+        Number of time steps per block.
+        Defaults to all time steps in one block.
+
+    Yields
+    ------
+    start: int
+        First time step of the block.
+    dw: array_like
+        Array of standard normal random variables (block_size x
+        paths).
+    """
+
+    random_state = check_random_state(random_state)
+
+    if block_size is None:
+        block_size = time_steps
+
+    for start in range(0, time_steps, max(block_size, 1)):
+        size = (min(block_size, time_steps - start), paths)
+
+        yield start, draw_wiener_block(random_state, size, dtype)
+
+
+@instrument
+def draw_wiener_block(random_state, size, dtype=np.float64):
+    """
+    Draws one block of standard normal random variables. The Euler,
+    full truncation and exact Vasicek schemes draw their Wiener
+    increments here, so instrumentation shows their time spent on
+    random numbers. The exact CIR scheme samples its transition
+    directly and does not use this function.
+
+    Parameters
+    ----------
+    random_state: Generator or RandomState
+        Source of the random numbers.
+    size: tuple
+        Shape of the block.
+    dtype: dtype
+        Float type of the random variables.
+        Defaults to float64.
+
+    Returns
+    -------
+    dw: array_like
+        Array of standard normal random variables.
+    """
+
+    if isinstance(random_state, np.random.Generator):
+        dw = random_state.standard_normal(size, dtype=dtype)
+    else:
+        dw = random_state.standard_normal(size).astype(dtype,
+                                                       copy=False)
+
+    return dw
+
+
+def split_paths(paths, chunk_size):
+    """
+    Splits the total number of paths into chunks of at most
+    chunk_size paths.
+
+    Parameters
+    ----------
+    paths: int
+        Total number of paths.
+    chunk_size: int
+        Maximum number of paths per chunk.
+
+    Returns
+    -------
+    blocks: list
+        Number of paths in each chunk.
+    """
+
+    full_blocks, remainder = divmod(paths, chunk_size)
+    blocks = [chunk_size] * full_blocks
+
+    if remainder > 0:
+        blocks.append(remainder)
+
+    return blocks
+
+
+def spawn_seeds(random_state, n_seeds):
+    """
+    Creates independent child seeds for chunks of paths.
+
+    Parameters
+    ----------
+    random_state: None, int or SeedSequence
+        Parent seed. None is treated as the seed 123.
+    n_seeds: int
+        Number of child seeds.
+
+    Returns
+    -------
+    seeds: list
+        List of SeedSequence instances.
+    """
+
+    if random_state is None:
+        random_state = 123
+
+    if not isinstance(random_state, np.random.SeedSequence):
+        random_state = np.random.SeedSequence(random_state)
+
+    return random_state.spawn(n_seeds)
+
+
+def map_blocks(function, blocks, seeds, workers=None):
+    """
+    Applies function(paths, seed) to every chunk of paths, either in
+    this process or across a pool of worker processes. Results are
+    returned in chunk order, so they do not depend on workers.
+
+    Parameters
+    ----------
+    function: function
+        Picklable function of the number of paths and the seed.
+    blocks: list
+        Number of paths in each chunk.
+    seeds: list
+        Seed of each chunk.
+    workers: int
+        Number of worker processes.
+        Defaults to running in this process.
+
+    Returns
+    -------
+    results: list
+        Result of function for each chunk.
+    """
+
+    if (workers is None) or (workers <= 1):
+        return list(map(function, blocks, seeds))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, blocks, seeds))
+
+
+def create_paths_block(rates, dt, paths, random_state=None, **kwargs):
+    """
+    Creates interest rate paths for one chunk of paths. Used by
+    InterestRates.create_paths_parallel.
+    """
+
+    return rates.create_paths(dt, paths=paths,
+                              random_state=random_state, **kwargs)
+
+
+def calc_discount_moments(rates, dt, paths, random_state=None,
+                          **kwargs):
+    """
+    Simulates interest rate paths and calculates the mean and the sum
+    of squared deviations of the discount factors at each time step.
+
+    Parameters
+    ----------
+    rates: InterestRates
+        Short-rate model used to create the paths.
+    dt: float
+        The time interval.
+    paths: int
+        Total number of paths.
+    random_state: None, int, SeedSequence, Generator or RandomState
+        Source of the random numbers. See check_random_state.
+    **kwargs:
+        Additional arguments for create_paths.
+
+    Returns
+    -------
+    count: int
+        Number of paths.
+    mean: array_like
+        Mean discount factor at each time step.
+    m2: array_like
+        Sum of squared deviations from the mean at each time step.
+    """
+
+    # Create Monte-Carlo paths:
+    mc = rates.create_paths(dt, paths=paths, random_state=random_state,
+                            **kwargs)[1:]
+
+    # Get the cumulative sum of each path (i.e. compute the
+    # integral) and the discount factors:
+    mc *= dt
+    np.cumsum(mc, axis=0, out=mc)
+    np.exp(-mc, out=mc)
+
+    mean = np.mean(mc, axis=1)
+    mc -= mean[:, np.newaxis]
+    m2 = np.einsum("ij,ij->i", mc, mc)
+
+    return paths, mean, m2
+
+
+def combine_moments(moments_a, moments_b):
+    """
+    Combines the count, mean and sum of squared deviations of two
+    groups of paths (Chan et al.).
+
+    Parameters
+    ----------
+    moments_a: tuple
+        Count, mean and sum of squared deviations of the first group.
+    moments_b: tuple
+        Count, mean and sum of squared deviations of the second group.
+
+    Returns
+    -------
+    moments: tuple
+        Count, mean and sum of squared deviations of both groups.
+    """
+
+    count_a, mean_a, m2_a = moments_a
+    count_b, mean_b, m2_b = moments_b
+    count = count_a + count_b
+
+    delta = mean_b - mean_a
+    mean = mean_a + delta*(count_b/count)
+    m2 = m2_a + m2_b + (delta**2)*(count_a*count_b/count)
+
+    return count, mean, m2
+
+
 class InterestRates(object):
     """
     Class for risk-free interest rate dynamic construction.
@@ -73,6 +422,9 @@ class InterestRates(object):
         Defaults to 0.
     """
 
+    # Parameters the affine coefficients depend on:
+    affine_parameters = ()
+
     def __init__(self, initial_rate, terminal_period, current_period=0):
         self.initial_rate = initial_rate
         self.terminal_period = terminal_period
@@ -81,6 +433,34 @@ class InterestRates(object):
         # Check time periods:
         self.check_time_periods()
 
+    def get_affine_coefficients(self, time_diff):
+        """
+        Returns the coefficients of the affine term structure from
+        affine_cache, calculating them only for new combinations of
+        model parameters and maturities.
+
+        Parameters
+        ----------
+        time_diff: array_like
+            Time to maturity of the zero-coupon bonds.
+
+        Returns
+        -------
+        a_t: array_like
+            Value of A(t, T).
+        b_t: array_like
+            Value of B(t, T).
+        """
+
+        time_diff = np.asarray(time_diff, dtype=float)
+        key = (type(self).__name__,
+               tuple(float(getattr(self, name)) for name in
+                     self.affine_parameters),
+               time_diff.shape, time_diff.tobytes())
+
+        return affine_cache.get(key, self.calc_affine_coefficients,
+                                time_diff)
+
     def check_time_periods(self):
         """
         Check to see if terminal_period is greater than current_period:
@@ -115,7 +495,7 @@ class InterestRates(object):
 
         return price
 
-    def setup_paths(self, dt, paths):
+    def setup_paths(self, dt, paths, dtype=np.float64):
         """
         Sets up initial array for interest rate paths used for Monte
         Carlo simulations.
@@ -126,6 +506,9 @@ class InterestRates(object):
             The time interval.
         paths: int
             Total number of paths.
+        dtype: dtype
+            Float type of the interest rate paths.
+            Defaults to float64.
 
         Returns
         -------
@@ -138,14 +521,17 @@ class InterestRates(object):
                           self.current_period)/dt) + 1
 
         # Create initial array of interest rates (time_steps x paths):
-        r_array = np.zeros([time_steps, paths])
+        r_array = np.zeros([time_steps, paths], dtype=dtype)
 
         # Initialize first row as self.initial_rate:
         r_array[0, :] = self.initial_rate
 
         return r_array
 
-    def calc_monte_carlo_price(self, dt, paths):
+    def calc_monte_carlo_price(self, dt, paths, chunk_size=None,
+                               random_state=None,
+                               return_std_error=False, workers=None,
+                               **kwargs):
         """
         Calculates the price of a zero-coupon bond at each dt time
         step using Monte Carlo simulations. The last index of the
@@ -158,25 +544,237 @@ class InterestRates(object):
             The time interval.
         paths: int
             Total number of paths.
+        chunk_size: int
+            Number of paths simulated at once. Only running sums of
+            the discount factors are kept between chunks, so memory is
+            bounded by chunk_size. Each chunk draws from its own child
+            of SeedSequence(random_state), so for a fixed random_state
+            the paths, and so the price, depend on chunk_size and
+            differ from the unchunked default. Keep chunk_size fixed
+            to reproduce a price.
+            Defaults to all paths at once.
+        random_state: None, int, SeedSequence, Generator or RandomState
+            Source of the random numbers. See check_random_state.
+            Must be None, an int or a SeedSequence if chunk_size is
+            given, where None is treated as the seed 123.
+        return_std_error: bool
+            Whether to also return the Monte Carlo standard error.
+            Defaults to False.
+        workers: int
+            Number of worker processes that simulate the chunks. Giving
+            workers switches to the chunked random streams, with
+            chunks of 10000 paths if chunk_size is not given. For a
+            given chunk_size the price is the same for any workers,
+            including None, so workers=None with chunk_size=10000
+            reproduces the price of workers=n without chunk_size.
+            Defaults to running in this process.
+        **kwargs:
+            Additional arguments for create_paths.
 
         Returns
         -------
         price: array_like
             Price of a zero-coupon bond.
+        std_error: array_like
+            Standard error of the price. Only returned if
+            return_std_error is True. NaN for a single path.
+        """
+
+        # Any chunk_size or workers uses the chunked random streams:
+        chunked = (chunk_size is not None) or (workers is not None)
+        if chunked and (chunk_size is None):
+            chunk_size = 10000
+
+        if not chunked:
+            count, price, m2 = calc_discount_moments(
+                self, dt, paths, random_state, **kwargs)
+        else:
+            # Simulate each chunk with its own random stream and
+            # combine the running sums in chunk order:
+            blocks = split_paths(paths, chunk_size)
+            seeds = spawn_seeds(random_state, len(blocks))
+            function = partial(calc_discount_moments, self, dt,
+                               **kwargs)
+            count, price, m2 = 0, 0.0, 0.0
+
+            for moments in map_blocks(function, blocks, seeds, workers):
+                count, price, m2 = combine_moments((count, price, m2),
+                                                   moments)
+
+        if not return_std_error:
+            return price
+
+        # The standard error needs at least two paths:
+        if count < 2:
+            std_error = np.full(np.shape(price), np.nan)[()]
+        else:
+            std_error = np.sqrt(m2/(count - 1.0)/count)
+
+        return price, std_error
+
+    def create_paths_parallel(self, dt, paths, chunk_size=10000,
+                              workers=None, random_state=None,
+                              **kwargs):
+        """
+        Creates interest rate paths in chunks of paths spread across
+        worker processes. Each chunk draws from its own child of
+        SeedSequence(random_state), so the paths only depend on
+        chunk_size and not on workers.
+
+        Parameters
+        ----------
+        dt: float
+            The time interval.
+        paths: int
+            Total number of paths.
+        chunk_size: int
+            Number of paths per chunk.
+            Defaults to 10000.
+        workers: int
+            Number of worker processes.
+            Defaults to running in this process.
+        random_state: None, int or SeedSequence
+            Parent seed. None is treated as the seed 123.
+        **kwargs:
+            Additional arguments for create_paths.
+
+        Returns
+        -------
+        r_array: array_like
+            Array of interest rate paths following the underlying
+            short-rate model
+        """
+
+        blocks = split_paths(paths, chunk_size)
+        seeds = spawn_seeds(random_state, len(blocks))
+        function = partial(create_paths_block, self, dt, **kwargs)
+
+        return np.hstack(map_blocks(function, blocks, seeds, workers))
+
+    def calc_zero_coupon_price(self, r_t):
+        """
+        Calculates the price of a zero-coupon bond using an affine
+        term structure.
+
+        Parameters
+        ----------
+        r_t: float
+            Annual interest rate at time t.
+
+        Returns
+        -------
+        price: float
+            Price of a zero-coupon bond.
         """
 
-        # Create Monte-Carlo paths:
-        mc = self.create_paths(dt, paths=paths)[1:]
+        # Calculate the coefficients A(self.current_period,
+        # self.terminal_period) and B(self.current_period,
+        # self.terminal_period):
+        a_t, b_t = self.get_affine_coefficients(
+            self.terminal_period - self.current_period)
 
-        # Get the cumulative sum of each path (i.e. compute the
-        # integral):
-        mc_sum = np.cumsum(mc*dt, axis=0)
+        # Calculate the price:
+        price = self.calc_affine_term_structure(r_t, a_t, b_t)
 
-        # Find the price of a zero-coupon bond for each time step:
-        price = np.mean(np.exp(-mc_sum), axis=1)
+        return price
+
+    def calc_zero_coupon_curve(self, maturities, r_t=None):
+        """
+        Calculates the prices of zero-coupon bonds for a whole grid of
+        maturities at once.
+
+        Parameters
+        ----------
+        maturities: array_like
+            Times to maturity measured from self.current_period.
+        r_t: array_like
+            Annual interest rates at time t.
+            Default is None, which uses self.initial_rate.
+
+        Returns
+        -------
+        price: array_like
+            Prices of zero-coupon bonds with shape
+            r_t.shape + maturities.shape.
+        """
+
+        # Check if r_t is None:
+        if r_t is None:
+            r_t = self.initial_rate
+
+        a_t, b_t = self.get_affine_coefficients(maturities)
+
+        # Broadcast every r_t against every maturity:
+        r_t = np.asarray(r_t, dtype=float)
+        r_t = r_t.reshape(r_t.shape + (1,)*np.ndim(maturities))
+        price = self.calc_affine_term_structure(r_t, a_t, b_t)
 
         return price
 
+    def calc_zero_rate_curve(self, maturities, r_t=None):
+        """
+        Calculates the spot rates of zero-coupon bonds for a whole grid
+        of maturities at once.
+
+        Parameters
+        ----------
+        maturities: array_like
+            Times to maturity measured from self.current_period.
+            Must be positive.
+        r_t: array_like
+            Annual interest rates at time t.
+            Default is None, which uses self.initial_rate.
+
+        Returns
+        -------
+        spot_rate: array_like
+            Spot rates with shape r_t.shape + maturities.shape.
+        """
+
+        price = self.calc_zero_coupon_curve(maturities, r_t)
+
+        # Calculate spot rates:
+        spot_rate = -np.log(price) / np.asarray(maturities, dtype=float)
+
+        return spot_rate
+
+    def calc_forward_rate_curve(self, maturities, r_t=None):
+        """
+        Calculates the forward rates between consecutive maturities of
+        a grid at once. The first forward rate runs from
+        self.current_period to the first maturity.
+
+        Parameters
+        ----------
+        maturities: array_like
+            Increasing times to maturity measured from
+            self.current_period.
+        r_t: array_like
+            Annual interest rates at time t.
+            Default is None, which uses self.initial_rate.
+
+        Returns
+        -------
+        forward_rate: array_like
+            Forward rates with shape r_t.shape + maturities.shape.
+        """
+
+        # Add the price of a bond that matures now:
+        ndim = np.ndim(maturities)
+        maturities = np.concatenate(([0.0], np.atleast_1d(
+            np.asarray(maturities, dtype=float))))
+        price = self.calc_zero_coupon_curve(maturities, r_t)
+
+        forward_rate = calc_forward_rate(price[..., :-1],
+                                         price[..., 1:],
+                                         np.diff(maturities))
+
+        # A single maturity gives one forward rate per r_t:
+        if ndim == 0:
+            forward_rate = forward_rate[..., 0]
+
+        return forward_rate
+
     def calc_zero_rate(self, r_t=None):
         """
         Calculates the spot rate of a zero-coupon bond.
@@ -230,7 +828,33 @@ class ConstantRates(InterestRates):
         InterestRates.__init__(self, initial_rate, terminal_period,
                                current_period)
 
-    def create_paths(self, dt):
+    @staticmethod
+    def calc_affine_coefficients(time_diff):
+        """
+        Calculates the coefficients of the affine term structure. With
+        a flat short rate the price is exp(-r_t*time_diff).
+
+        Parameters
+        ----------
+        time_diff: array_like
+            Time to maturity of the zero-coupon bonds.
+
+        Returns
+        -------
+        a_t: array_like
+            Value of A(t, T).
+        b_t: array_like
+            Value of B(t, T).
+        """
+
+        b_t = np.asarray(time_diff, dtype=float)
+        a_t = np.ones_like(b_t)
+
+        return a_t, b_t
+
+    @instrument
+    def create_paths(self, dt, paths=1, random_state=None,
+                     dtype=np.float64, block_size=None):
         """
         Creates interest rate path using the underlying short-rate
         model.
@@ -239,6 +863,16 @@ class ConstantRates(InterestRates):
         ----------
         dt: float
             The change in time.
+        paths: int
+            Number of paths to create.
+            Default value is 1.
+        random_state: None, int, SeedSequence, Generator or RandomState
+            Unused, the paths are not random.
+        dtype: dtype
+            Float type of the interest rate paths.
+            Defaults to float64.
+        block_size: int
+            Unused, the paths are not random.
 
         Returns
         -------
@@ -247,13 +881,9 @@ class ConstantRates(InterestRates):
             short-rate model
         """
 
-        # Calculate the total number of time steps:
-        time_steps = int((self.terminal_period -
-                          self.current_period)/dt) + 1
-
-        # Create array of interest rates (time_steps x 1):
-        r_array = np.repeat(self.initial_rate, time_steps).reshape(
-            time_steps, 1)
+        # Create array of interest rates (time_steps x paths):
+        r_array = self.setup_paths(dt, paths, dtype)
+        r_array[:] = self.initial_rate
 
         return r_array
 
@@ -284,6 +914,9 @@ class VasicekRates(InterestRates):
         Defaults to 0.
     """
 
+    # Parameters the affine coefficients depend on:
+    affine_parameters = ("theta", "mu", "sigma")
+
     def __init__(self, initial_rate, theta, mu, sigma,
                  terminal_period, current_period=0):
         InterestRates.__init__(self, initial_rate, terminal_period,
@@ -292,44 +925,42 @@ class VasicekRates(InterestRates):
         self.mu = mu
         self.sigma = sigma
 
-    def calc_zero_coupon_price(self, r_t):
+    def calc_affine_coefficients(self, time_diff):
         """
-        Calculates the price of a zero-coupon bond using an affine
-        term structure.
+        Calculates the coefficients of the affine term structure.
 
         Parameters
         ----------
-        r_t: float
-            Annual interest rate at time t.
+        time_diff: array_like
+            Time to maturity of the zero-coupon bonds.
 
         Returns
         -------
-        price: float
-            Price of a zero-coupon bond.
+        a_t: array_like
+            Value of A(t, T).
+        b_t: array_like
+            Value of B(t, T).
         """
 
         # Calculate the value of B(self.current_period,
         # self.terminal_period):
-        b_t = ((1.0 - np.exp(-self.theta*(self.terminal_period -
-                                          self.current_period)))
-               / self.theta)
+        b_t = (1.0 - np.exp(-self.theta*time_diff)) / self.theta
 
         # Calculate the value of A(self.current_period,
         # self.terminal_period):
-        first_term = ((b_t - self.terminal_period +
-                       self.current_period)*(
+        first_term = ((b_t - time_diff)*(
                               (self.theta**2*self.mu) -
                               0.5*self.sigma**2))/(self.theta**2)
         second_term = (self.sigma**2) * (b_t**2) / (4.0*self.theta)
 
         a_t = np.exp(first_term-second_term)
 
-        # Calculate the price:
-        price = self.calc_affine_term_structure(r_t, a_t, b_t)
-
-        return price
+        return a_t, b_t
 
-    def create_paths(self, dt, paths=1):
+    @instrument
+    def create_paths(self, dt, paths=1, method="euler",
+                     random_state=None, dtype=np.float64,
+                     block_size=None):
         """
         Creates interest rate path using the underlying short-rate
         model.
@@ -341,6 +972,21 @@ class VasicekRates(InterestRates):
         paths: int
             Number of paths to create.
             Default value is 1.
+        method: str
+            Discretization scheme. "euler" steps through time with the
+            Euler scheme. "exact" samples the Gaussian transition of the
+            Ornstein-Uhlenbeck process, which is exact for any dt.
+            Default value is "euler".
+        random_state: None, int, SeedSequence, Generator or RandomState
+            Source of the random numbers. See check_random_state.
+            Defaults to the legacy generator seeded with 123.
+        dtype: dtype
+            Float type of the interest rate paths.
+            Defaults to float64.
+        block_size: int
+            Number of time steps of random numbers generated at once.
+            Does not change the paths, only the memory used.
+            Defaults to all time steps at once.
 
         Returns
         -------
@@ -349,21 +995,125 @@ class VasicekRates(InterestRates):
             short-rate model
         """
 
+        if method not in ["euler", "exact"]:
+            raise ValueError("method must be either 'euler' or "
+                             "'exact'")
+
         # Create initial array of interest rates:
-        r_array = self.setup_paths(dt, paths)
+        r_array = self.setup_paths(dt, paths, dtype)
 
         # Get time steps:
         time_steps = r_array.shape[0]
 
-        # Create standard normal random variables:
-        dw = create_wiener(time_steps, paths)
+        # Running sums of the exact scheme carried between blocks:
+        state = np.zeros(paths, dtype=dtype)
+
+        # Loop through blocks of standard normal random variables:
+        for start, dw in iterate_wiener(time_steps, paths, random_state,
+                                        dtype, block_size):
+            if method == "exact":
+                self.create_exact_paths(r_array, dt, dw, start, state)
+                continue
+
+            # Loop through to create interest rate paths:
+            for t in range(max(start, 1), start + len(dw)):
+                r_array[t, :] = r_array[t - 1, :] + \
+                                self.theta*(self.mu -
+                                            r_array[t - 1, :])*dt + \
+                                self.sigma*np.sqrt(dt)*dw[t - start, :]
+
+        return r_array
+
+    def calc_exact_block_size(self, dt, time_steps):
+        """
+        Finds the number of time steps solved at once by the exact
+        scheme. Keeps exp(theta*dt*block) small enough for the
+        cumulative sum to stay accurate, and is never longer than the
+        paths.
+        """
+
+        block = 1024
+        if self.theta > 0.0:
+            block = max(1, int(min(10.0/(self.theta*dt), 2**31)))
+
+        return min(block, time_steps)
+
+    def create_exact_paths(self, r_array, dt, dw, start=0, state=None):
+        """
+        Fills r_array with the exact discretization of the Vasicek
+        model. The deviation from mu follows the linear recurrence
+        x[t] = a*x[t-1] + shock[t], which is solved for blocks of time
+        steps at once with a cumulative sum. The running sum is carried
+        in state, so dw can be split at any time step without changing
+        the paths.
+
+        Parameters
+        ----------
+        r_array: array_like
+            Initial array of interest rate paths.
+        dt: float
+            The time interval.
+        dw: array_like
+            Array of standard normal random variables for the time
+            steps start to start + len(dw).
+        start: int
+            Time step of the first row of dw.
+            Defaults to 0.
+        state: array_like
+            Running sum of the recurrence block at step start - 1, one
+            value per path. Updated in place. Must be given if dw
+            starts inside a recurrence block.
+            Defaults to zeros.
+
+        Returns
+        -------
+        r_array: array_like
+            Array of interest rate paths following the underlying
+            short-rate model
+        """
 
-        # Loop through to create interest rate paths:
-        for t in range(1, time_steps):
-            r_array[t, :] = r_array[t - 1, :] + \
-                            self.theta*(self.mu -
-                                        r_array[t - 1, :])*dt + \
-                            self.sigma*np.sqrt(dt)*dw[t, :]
+        stop = start + len(dw)
+        if state is None:
+            state = np.zeros(r_array.shape[1], dtype=r_array.dtype)
+
+        # Calculate the conditional mean reversion and volatility:
+        if self.theta > 0.0:
+            decay = np.exp(-self.theta*dt)
+            volatility = self.sigma*np.sqrt(
+                (1.0 - decay**2)/(2.0*self.theta))
+        else:
+            decay = 1.0
+            volatility = self.sigma*np.sqrt(dt)
+
+        block = self.calc_exact_block_size(dt, len(r_array))
+        powers = decay**np.arange(1, block+1)[:, np.newaxis]
+        scales = (volatility / powers).astype(r_array.dtype)
+        powers = powers.astype(r_array.dtype)
+
+        # Solve the recurrence block by block. Blocks start at 1 and at
+        # multiples of block, so the result does not depend on how the
+        # time steps are split into dw:
+        t_start = max(start, 1)
+        while t_start < stop:
+            origin = max((t_start//block)*block, 1)
+            t_stop = min((t_start//block + 1)*block, stop)
+            offset = t_start - origin
+
+            # x[origin+i] = a**(i+1) * (x[origin-1] +
+            #               sum_j a**-(j+1) * shock[origin+j]):
+            shocks = dw[t_start-start:t_stop-start] * \
+                scales[offset:offset+t_stop-t_start]
+            if t_start == origin:
+                shocks[0] += r_array[t_start-1] - self.mu
+            else:
+                shocks[0] += state
+            np.cumsum(shocks, axis=0, out=shocks)
+            state[:] = shocks[-1]
+            np.multiply(shocks, powers[offset:offset+t_stop-t_start],
+                        out=r_array[t_start:t_stop])
+            r_array[t_start:t_stop] += self.mu
+
+            t_start = t_stop
 
         return r_array
 
@@ -395,6 +1145,9 @@ class CirRates(InterestRates):
         Defaults to 0.
     """
 
+    # Parameters the affine coefficients depend on:
+    affine_parameters = ("theta", "mu", "sigma")
+
     def __init__(self, initial_rate, theta, mu, sigma,
                  terminal_period, current_period=0):
         InterestRates.__init__(self, initial_rate, terminal_period,
@@ -403,28 +1156,26 @@ class CirRates(InterestRates):
         self.mu = mu
         self.sigma = sigma
 
-    def calc_zero_coupon_price(self, r_t):
+    def calc_affine_coefficients(self, time_diff):
         """
-        Calculates the price of a zero-coupon bond using an affine
-        term structure.
+        Calculates the coefficients of the affine term structure.
 
         Parameters
         ----------
-        r_t: float
-            Annual interest rate at time t.
+        time_diff: array_like
+            Time to maturity of the zero-coupon bonds.
 
         Returns
         -------
-        price: float
-            Price of a zero-coupon bond.
+        a_t: array_like
+            Value of A(t, T).
+        b_t: array_like
+            Value of B(t, T).
         """
 
         # Setup gamma value:
         gamma = np.sqrt((self.theta**2) + 2.0*(self.sigma**2))
 
-        # Setup time difference:
-        time_diff = self.terminal_period - self.current_period
-
         # Calculate the value of B(self.current_period,
         # self.terminal_period):
         b_t = (2.0*(np.exp(gamma*time_diff) - 1.0)) / \
@@ -439,12 +1190,12 @@ class CirRates(InterestRates):
                 + 2.0*gamma))**(2.0*self.theta*self.mu/(
                 self.sigma**2))
 
-        # Calculate the price:
-        price = self.calc_affine_term_structure(r_t, a_t, b_t)
-
-        return price
+        return a_t, b_t
 
-    def create_paths(self, dt, paths=1):
+    @instrument
+    def create_paths(self, dt, paths=1, method="euler",
+                     random_state=None, dtype=np.float64,
+                     block_size=None):
         """
         Creates interest rate path using the underlying short-rate
         model.
@@ -456,6 +1207,25 @@ class CirRates(InterestRates):
         paths: int
             Number of paths to create.
             Default value is 1.
+        method: str
+            Discretization scheme. "euler" steps through time with the
+            Euler scheme and returns NaN once a rate turns negative.
+            "full_truncation" uses the positive part of the rate in
+            the drift and volatility of the Euler scheme. "exact"
+            samples the noncentral chi-square transition of the CIR
+            process, which is exact for any dt, including theta = 0,
+            and needs sigma > 0.
+            Default value is "euler".
+        random_state: None, int, SeedSequence, Generator or RandomState
+            Source of the random numbers. See check_random_state.
+            Defaults to the legacy generator seeded with 123.
+        dtype: dtype
+            Float type of the interest rate paths.
+            Defaults to float64.
+        block_size: int
+            Number of time steps of random numbers generated at once.
+            Does not change the paths, only the memory used.
+            Defaults to all time steps at once.
 
         Returns
         -------
@@ -464,22 +1234,133 @@ class CirRates(InterestRates):
             short-rate model
         """
 
+        if method not in ["euler", "full_truncation", "exact"]:
+            raise ValueError("method must be one of 'euler', "
+                             "'full_truncation' or 'exact'")
+
         # Create initial array of interest rates:
-        r_array = self.setup_paths(dt, paths)
+        r_array = self.setup_paths(dt, paths, dtype)
 
         # Get time steps:
         time_steps = r_array.shape[0]
 
-        # Create standard normal random variables:
-        dw = create_wiener(time_steps, paths)
-
-        # Loop through to create interest rate paths:
-        for t in range(1, time_steps):
-            r_array[t, :] = r_array[t - 1, :] + \
-                            self.theta*(self.mu -
-                                        r_array[t - 1, :])*dt + \
-                            self.sigma*np.sqrt(r_array[t - 1,
-                                               :])*np.sqrt(dt)*dw[
-                                                               t, :]
+        if method == "exact":
+            return self.create_exact_paths(r_array, dt, random_state)
+
+        # Auxiliary process for the full truncation scheme:
+        x_t = r_array[0, :].copy()
+
+        # Loop through blocks of standard normal random variables:
+        for start, dw in iterate_wiener(time_steps, paths, random_state,
+                                        dtype, block_size):
+            if method == "full_truncation":
+                self.create_truncated_paths(r_array, dt, dw, x_t, start)
+                continue
+
+            # Loop through to create interest rate paths:
+            for t in range(max(start, 1), start + len(dw)):
+                r_array[t, :] = r_array[t - 1, :] + \
+                                self.theta*(self.mu -
+                                            r_array[t - 1, :])*dt + \
+                                self.sigma*np.sqrt(r_array[t - 1,
+                                                   :]) * \
+                                np.sqrt(dt)*dw[t - start, :]
+
+        return r_array
+
+    def create_truncated_paths(self, r_array, dt, dw, x_t, start=0):
+        """
+        Fills r_array with the full truncation Euler scheme. The
+        auxiliary process may turn negative, but only its positive
+        part enters the drift and volatility and is returned as the
+        rate.
+
+        Parameters
+        ----------
+        r_array: array_like
+            Initial array of interest rate paths.
+        dt: float
+            The time interval.
+        dw: array_like
+            Array of standard normal random variables for the time
+            steps start to start + len(dw).
+        x_t: array_like
+            Auxiliary process at time step start - 1. Updated in
+            place.
+        start: int
+            Time step of the first row of dw.
+            Defaults to 0.
+
+        Returns
+        -------
+        r_array: array_like
+            Array of interest rate paths following the underlying
+            short-rate model
+        """
+
+        for t in range(max(start, 1), start + len(dw)):
+            r_positive = r_array[t - 1, :]
+            x_t += self.theta*(self.mu - r_positive)*dt + \
+                self.sigma*np.sqrt(r_positive)*np.sqrt(dt) * \
+                dw[t - start, :]
+            np.maximum(x_t, 0.0, out=r_array[t, :])
+
+        return r_array
+
+    def create_exact_paths(self, r_array, dt, random_state=None):
+        """
+        Fills r_array by sampling the exact transition of the CIR
+        model, a scaled noncentral chi-square distribution. Handles
+        the limit theta = 0, where the scale is sigma**2*dt/4, and
+        zero degrees of freedom (theta*mu = 0), where the noncentral
+        chi-square is sampled as a Poisson mixture of gammas. Needs
+        sigma > 0.
+
+        Parameters
+        ----------
+        r_array: array_like
+            Initial array of interest rate paths.
+        dt: float
+            The time interval.
+        random_state: None, int, SeedSequence, Generator or RandomState
+            Source of the random numbers. See check_random_state.
+            Defaults to the legacy generator seeded with 123.
+
+        Returns
+        -------
+        r_array: array_like
+            Array of interest rate paths following the underlying
+            short-rate model
+        """
+
+        if self.sigma <= 0:
+            raise ValueError("sigma must be positive for the exact "
+                             "scheme")
+
+        random_state = check_random_state(random_state)
+
+        # Calculate the scale, degrees of freedom and the decay of the
+        # noncentrality. (1 - decay)/theta tends to dt as theta goes
+        # to 0:
+        decay = np.exp(-self.theta*dt)
+        if self.theta > 0:
+            scale = (self.sigma**2)*(-np.expm1(-self.theta*dt)) / \
+                (4.0*self.theta)
+        else:
+            scale = (self.sigma**2)*dt/4.0
+        df = 4.0*self.theta*self.mu/(self.sigma**2)
+
+        for t in range(1, r_array.shape[0]):
+            nonc = r_array[t - 1, :]*decay/scale
+
+            if df > 0:
+                r_array[t, :] = scale * \
+                    random_state.noncentral_chisquare(df, nonc)
+            else:
+                # A noncentral chi-square with 0 degrees of freedom is
+                # a chi-square with 2N degrees of freedom, N Poisson
+                # with mean nonc/2:
+                counts = random_state.poisson(nonc/2.0)
+                r_array[t, :] = 2.0*scale*random_state.gamma(counts)
 
         return r_array
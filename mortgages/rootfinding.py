@@ -3,6 +3,8 @@
 
 import numpy as np
 
+from .instrumentation import instrument
+
 
 class OptimalRoots(object):
     """
@@ -25,6 +27,28 @@ class OptimalRoots(object):
         self.iteration = iteration
 
 
+def subset_args(vector_args, idx):
+    """
+    Subsets the per-problem arguments to the problems in idx along
+    their first dimension.
+    """
+
+    return tuple(np.asarray(arg)[idx] for arg in vector_args)
+
+
+def check_vector_args(vector_args, n):
+    """
+    Checks that every per-problem argument has one entry per problem
+    along its first dimension.
+    """
+
+    for arg in vector_args:
+        if (np.ndim(arg) == 0) or (np.shape(arg)[0] != n):
+            raise ValueError("vector_args must have first dimension "
+                             "{}".format(n))
+
+
+@instrument(count_evaluations=True)
 def brent(f, a, b, args=(), max_iteration=100, tolerance=1e-8):
     """
     Calculate roots using Brent's method.
@@ -137,3 +161,282 @@ def brent(f, a, b, args=(), max_iteration=100, tolerance=1e-8):
 
         if loop_counter == max_iteration:
             return OptimalRoots(s, fs, loop_counter)
+
+
+@instrument(count_evaluations=True)
+def brent_vectorized(f, a, b, args=(), vector_args=(),
+                     max_iteration=100, tolerance=1e-8):
+    """
+    Calculate roots of many independent problems at once using Brent's
+    method. Each problem converges on its own and is dropped from the
+    function evaluations once it has converged.
+
+    Parameters
+    ----------
+    f: function
+        Vectorized objective function. Takes an array of points and
+        returns an array of function values of the same length.
+    a: array_like
+        Lower bounds for the roots.
+    b: array_like
+        Upper bounds for the roots.
+    args: tuple, optional
+        Additional arguments for the function shared by every problem.
+        They are passed unchanged.
+    vector_args: tuple, optional
+        Additional arrays with one entry per problem along their first
+        dimension. They are subset to the problems that have not
+        converged yet and passed before args, so f is called as
+        f(x, *vector_args, *args).
+    max_iteration: int, optional
+        Max number of iterations for the root finding algorithm.
+    tolerance: float, optional
+        Tolerance criteria for the root finding algorithm.
+
+    Returns
+    -------
+    root_value: array_like
+        Value of the roots.
+    func_value: array_like
+        Value of the function.
+        Should be close to 0.
+    iteration: array_like
+        Number of iterations for each root.
+    """
+
+    # Calculate end points:
+    a = np.atleast_1d(np.asarray(a, dtype=float))
+    b = np.atleast_1d(np.asarray(b, dtype=float))
+    args = tuple(args)
+    vector_args = tuple(vector_args)
+    fa = f(*((a,) + vector_args + args))
+    fb = f(*((b,) + vector_args + args))
+
+    # Set up one bracket per problem:
+    a, b, fa, fb = [np.array(x, dtype=float) for x in
+                    np.broadcast_arrays(a, b, fa, fb)]
+    n = len(a)
+    check_vector_args(vector_args, n)
+
+    # Check if fa is less than fb:
+    swap = np.abs(fa) < np.abs(fb)
+    a[swap], b[swap] = b[swap], a[swap]
+    fa[swap], fb[swap] = fb[swap], fa[swap]
+
+    # Create point c and d:
+    c = a.copy()
+    fc = fa.copy()
+    d = np.zeros(n)
+    mflag = np.ones(n, dtype=bool)
+
+    # Problems whose best bracket end is already a root need no
+    # iterations:
+    root_value = b.copy()
+    func_value = fb.copy()
+    iteration = np.zeros(n, dtype=int)
+    active = np.abs(fb) > tolerance
+
+    for loop_counter in range(1, max_iteration+1):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+
+        a_i, b_i, c_i, d_i = a[idx], b[idx], c[idx], d[idx]
+        fa_i, fb_i, fc_i = fa[idx], fb[idx], fc[idx]
+        mflag_i = mflag[idx]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Inverse quadratic interpolation:
+            s_iqi = ((a_i*fb_i*fc_i) / ((fa_i - fb_i)*(fa_i - fc_i)) +
+                     (b_i*fa_i*fc_i) / ((fb_i - fa_i)*(fb_i - fc_i)) +
+                     (c_i*fa_i*fb_i) / ((fc_i - fa_i)*(fc_i - fb_i)))
+
+            # Secant method:
+            s_secant = b_i - (fb_i*(b_i - a_i)/(fb_i - fa_i))
+
+        use_iqi = (fa_i != fc_i) & (fb_i != fc_i)
+        s = np.where(use_iqi, s_iqi, s_secant)
+
+        # Setup some conditions:
+        bound = (3.0*a_i + b_i)/4.0
+        condition_one = ~(((s > np.minimum(bound, b_i)) &
+                           (s < np.maximum(bound, b_i))) | (s == b_i))
+        condition_two = mflag_i & \
+            (np.abs(s - b_i) >= (np.abs(b_i - c_i)*0.5))
+        condition_three = ~mflag_i & \
+            (np.abs(s - b_i) >= (np.abs(c_i - d_i)*0.5))
+        condition_four = mflag_i & (np.abs(b_i - c_i) < abs(tolerance))
+        condition_five = ~mflag_i & (np.abs(c_i - d_i) < abs(tolerance))
+
+        # Use bisection where any condition holds:
+        bisection = condition_one | condition_two | condition_three | \
+            condition_four | condition_five
+        s = np.where(bisection, 0.5*(a_i + b_i), s)
+        mflag[idx] = bisection
+
+        # Calculate f(s):
+        fs = np.asarray(f(*((s,) + subset_args(vector_args, idx) +
+                            args)), dtype=float)
+
+        # Update points:
+        d[idx] = c_i
+        c[idx] = b_i
+        fc[idx] = fb_i
+
+        left = (fa_i*fs) < 0.0
+        b_i = np.where(left, s, b_i)
+        fb_i = np.where(left, fs, fb_i)
+        a_i = np.where(left, a_i, s)
+        fa_i = np.where(left, fa_i, fs)
+
+        # Check if fa is less than fb:
+        swap = np.abs(fa_i) < np.abs(fb_i)
+        a[idx] = np.where(swap, b_i, a_i)
+        b[idx] = np.where(swap, a_i, b_i)
+        fa[idx] = np.where(swap, fb_i, fa_i)
+        fb[idx] = np.where(swap, fa_i, fb_i)
+
+        # b is the bracket end with the smallest |f|, which includes s
+        # if s was kept:
+        root_value[idx] = b[idx]
+        func_value[idx] = fb[idx]
+        iteration[idx] = loop_counter
+
+        # Check convergence:
+        converged = (np.abs(fb[idx]) <= tolerance) | \
+                    (np.abs(fs) <= tolerance) | \
+                    (np.abs(b[idx] - a[idx]) <= tolerance)
+        active[idx[converged]] = False
+
+    return OptimalRoots(root_value, func_value, iteration)
+
+
+def newton(f, x0, args=(), vector_args=(), lower=None, upper=None,
+           max_iteration=20, tolerance=1e-10):
+    """
+    Calculate roots of many independent problems at once using
+    Newton's method, or Halley's method when the second derivative is
+    available. Problems that diverge or leave [lower, upper] fall back
+    to brent_vectorized on that bracket. Their root is NaN if f has the
+    same sign at lower and upper.
+
+    Parameters
+    ----------
+    f: function
+        Vectorized objective function. Returns a tuple of the function
+        value, first derivative and second derivative (or None) at an
+        array of points.
+    x0: array_like
+        Initial guesses for the roots.
+    args: tuple, optional
+        Additional arguments for the function shared by every problem.
+        They are passed unchanged.
+    vector_args: tuple, optional
+        Additional arrays with one entry per problem along their first
+        dimension. They are subset to the problems that have not
+        converged yet and passed before args, so f is called as
+        f(x, *vector_args, *args).
+    lower: float, optional
+        Lower bound for the roots used by the fallback.
+    upper: float, optional
+        Upper bound for the roots used by the fallback.
+    max_iteration: int, optional
+        Max number of iterations for the root finding algorithm.
+    tolerance: float, optional
+        Tolerance criteria for the step size.
+
+    Returns
+    -------
+    root_value: array_like
+        Value of the roots.
+    func_value: array_like
+        Value of the function.
+        Should be close to 0.
+    iteration: array_like
+        Number of iterations for each root.
+    """
+
+    # Evaluate the first iteration on all problems to find their
+    # number:
+    args = tuple(args)
+    vector_args = tuple(vector_args)
+    x = np.atleast_1d(np.asarray(x0, dtype=float))
+    values = f(*((x,) + vector_args + args))
+    x = np.array(np.broadcast_to(x, np.shape(values[0])))
+    n = len(x)
+    check_vector_args(vector_args, n)
+
+    iteration = np.zeros(n, dtype=int)
+    active = np.ones(n, dtype=bool)
+    diverged = np.zeros(n, dtype=bool)
+
+    for loop_counter in range(1, max_iteration+1):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+
+        if loop_counter > 1:
+            values = f(*((x[idx],) + subset_args(vector_args, idx) +
+                         args))
+
+        fx, d1, d2 = values
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Newton step:
+            step = fx / d1
+
+            # Halley correction:
+            if d2 is not None:
+                step = step / (1.0 - 0.5*step*d2/d1)
+
+        x_new = x[idx] - step
+        iteration[idx] = loop_counter
+
+        # Check divergence:
+        failed = ~np.isfinite(x_new)
+        if lower is not None:
+            failed |= x_new < lower
+        if upper is not None:
+            failed |= x_new > upper
+
+        x[idx] = np.where(failed, x[idx], x_new)
+        diverged[idx[failed]] = True
+        active[idx[failed]] = False
+
+        # Check convergence:
+        converged = ~failed & (np.abs(step) <= tolerance)
+        active[idx[converged]] = False
+
+    # Fall back to Brent's method for diverged problems:
+    diverged |= active
+    idx = np.flatnonzero(diverged)
+    if (len(idx) > 0) and (lower is not None) and (upper is not None):
+        def func_value_only(x_i, *args_i):
+            return f(*((x_i,) + args_i))[0]
+
+        # Only problems with a sign change on [lower, upper] have a
+        # root there. The others have none:
+        args_idx = subset_args(vector_args, idx) + args
+        f_lower = func_value_only(np.full(len(idx), float(lower)),
+                                  *args_idx)
+        f_upper = func_value_only(np.full(len(idx), float(upper)),
+                                  *args_idx)
+        bracketed = np.sign(f_lower) != np.sign(f_upper)
+        bracketed &= np.isfinite(f_lower) & np.isfinite(f_upper)
+        x[idx[~bracketed]] = np.nan
+
+        idx = idx[bracketed]
+        if len(idx) > 0:
+            fallback = brent_vectorized(func_value_only, lower, upper,
+                                        args=args,
+                                        vector_args=subset_args(
+                                            vector_args, idx),
+                                        max_iteration=100,
+                                        tolerance=tolerance)
+            x[idx] = fallback.root_value
+            iteration[idx] += fallback.iteration
+
+    func_value = np.asarray(f(*((x,) + vector_args + args))[0],
+                            dtype=float)
+
+    return OptimalRoots(x, func_value, iteration)
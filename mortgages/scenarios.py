@@ -0,0 +1,226 @@
+# Class to persist simulated interest rate paths as memory-mapped files:
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .rates import split_paths, spawn_seeds
+
+
+class ScenarioStore(object):
+    """
+    Class for a directory of simulated short-rate scenarios. Paths and
+    their cumulative discount factors are written once to .npy files
+    keyed by the model, its parameters, dt, the number of paths and the
+    seed. Later calls open them memory-mapped instead of simulating
+    again.
+
+    Parameters
+    ----------
+    directory: str
+        Directory where the scenarios are stored.
+        Created if it does not exist.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def create_key(rates, dt, paths, random_state=None,
+                   chunk_size=10000, **kwargs):
+        """
+        Creates the key of a scenario.
+
+        Parameters
+        ----------
+        rates: InterestRates
+            Short-rate model used to create the paths.
+        dt: float
+            The time interval.
+        paths: int
+            Total number of paths.
+        random_state: None, int or SeedSequence
+            Parent seed. None is treated as the seed 123.
+        chunk_size: int
+            Number of paths per chunk.
+        **kwargs:
+            Additional arguments for create_paths.
+
+        Returns
+        -------
+        key: str
+            Hexadecimal key of the scenario.
+        description: dict
+            Values that make up the key.
+        """
+
+        if random_state is None:
+            random_state = 123
+
+        if isinstance(random_state, np.random.SeedSequence):
+            seed = [random_state.entropy,
+                    list(random_state.spawn_key)]
+        elif isinstance(random_state, (int, np.integer)):
+            seed = int(random_state)
+        else:
+            raise ValueError("random_state must be None, an int or a "
+                             "SeedSequence")
+
+        parameters = {name: float(value) for name, value in
+                      sorted(vars(rates).items())
+                      if isinstance(value, (int, float, np.number))}
+        options = {name: str(value) for name, value in
+                   sorted(kwargs.items())}
+
+        description = {"model": type(rates).__name__,
+                       "parameters": parameters, "dt": float(dt),
+                       "paths": int(paths), "seed": seed,
+                       "chunk_size": int(chunk_size),
+                       "options": options}
+        key = hashlib.sha256(json.dumps(
+            description, sort_keys=True).encode()).hexdigest()[:32]
+
+        return key, description
+
+    def get_filenames(self, key):
+        """
+        Finds the file names of the paths, discount factors and
+        description of a scenario.
+        """
+
+        base = os.path.join(self.directory, key)
+
+        return base + "_paths.npy", base + "_discount.npy", \
+            base + ".json"
+
+    def contains(self, rates, dt, paths, random_state=None,
+                 chunk_size=10000, **kwargs):
+        """
+        Checks whether a scenario is already stored.
+        """
+
+        key = self.create_key(rates, dt, paths, random_state,
+                              chunk_size, **kwargs)[0]
+
+        return all(os.path.exists(filename) for filename in
+                   self.get_filenames(key))
+
+    def load_paths(self, rates, dt, paths, random_state=None,
+                   chunk_size=10000, **kwargs):
+        """
+        Opens the stored paths and cumulative discount factors of a
+        scenario, simulating and writing them first if needed. The
+        paths are the same as
+        rates.create_paths_parallel(dt, paths, chunk_size, ...).
+
+        Parameters
+        ----------
+        rates: InterestRates
+            Short-rate model used to create the paths.
+        dt: float
+            The time interval.
+        paths: int
+            Total number of paths.
+        random_state: None, int or SeedSequence
+            Parent seed. None is treated as the seed 123.
+        chunk_size: int
+            Number of paths simulated and written at once. Each chunk
+            has its own random stream, so the paths depend on
+            chunk_size, which is part of the scenario key.
+            Defaults to 10000.
+        **kwargs:
+            Additional arguments for create_paths.
+
+        Returns
+        -------
+        r_array: array_like
+            Read-only memory-mapped array of interest rate paths
+            (time_steps x paths).
+        discount: array_like
+            Read-only memory-mapped array of cumulative discount
+            factors exp(-sum(r*dt)) (time_steps x paths). The first
+            row is 1.
+        """
+
+        key, description = self.create_key(rates, dt, paths,
+                                           random_state, chunk_size,
+                                           **kwargs)
+        paths_file, discount_file, description_file = \
+            self.get_filenames(key)
+
+        if not self.contains(rates, dt, paths, random_state,
+                             chunk_size, **kwargs):
+            self.write_paths(rates, dt, paths, random_state, chunk_size,
+                             paths_file, discount_file, **kwargs)
+
+            temporary_file = "{}.{}.tmp".format(description_file,
+                                                os.getpid())
+            with open(temporary_file, "w") as file:
+                json.dump(description, file, indent=2, sort_keys=True)
+            os.replace(temporary_file, description_file)
+
+        r_array = np.load(paths_file, mmap_mode="r")
+        discount = np.load(discount_file, mmap_mode="r")
+
+        return r_array, discount
+
+    @staticmethod
+    def write_paths(rates, dt, paths, random_state, chunk_size,
+                    paths_file, discount_file, **kwargs):
+        """
+        Simulates the paths chunk by chunk and writes them and their
+        cumulative discount factors to .npy files. The files only
+        appear under their final names once they are complete.
+        """
+
+        if paths <= 0:
+            raise ValueError("paths must be positive")
+
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+
+        if kwargs.get("block_size", 1) <= 0:
+            raise ValueError("block_size must be positive")
+
+        blocks = split_paths(paths, chunk_size)
+        seeds = spawn_seeds(random_state, len(blocks))
+        suffix = ".{}.tmp".format(os.getpid())
+
+        start = 0
+        r_output = None
+        discount_output = None
+
+        for block_paths, seed in zip(blocks, seeds):
+            r_block = rates.create_paths(dt, paths=block_paths,
+                                         random_state=seed, **kwargs)
+
+            # Open the files once the number of time steps is known:
+            if r_output is None:
+                shape = (r_block.shape[0], paths)
+                r_output = np.lib.format.open_memmap(
+                    paths_file + suffix, mode="w+",
+                    dtype=r_block.dtype, shape=shape)
+                discount_output = np.lib.format.open_memmap(
+                    discount_file + suffix, mode="w+",
+                    dtype=r_block.dtype, shape=shape)
+
+            stop = start + block_paths
+            r_output[:, start:stop] = r_block
+
+            # Calculate the cumulative discount factors:
+            discount = discount_output[:, start:stop]
+            discount[0] = 1.0
+            np.cumsum(r_block[1:]*dt, axis=0, out=discount[1:])
+            np.exp(-discount[1:], out=discount[1:])
+
+            start = stop
+
+        r_output.flush()
+        discount_output.flush()
+        del r_output, discount_output
+
+        os.replace(paths_file + suffix, paths_file)
+        os.replace(discount_file + suffix, discount_file)
@@ -0,0 +1,173 @@
+# Functions to solve for implied rates, yields and terms:
+
+import numpy as np
+
+from .mortgages import calc_pmt_derivatives, \
+    calc_market_value_derivatives
+from .rootfinding import newton
+
+
+def calc_implied_rate(loan_amount, pmt, months, fv=0.0, lower=1e-9,
+                      upper=1.0, tolerance=1e-8):
+    """
+    Finds the monthly coupon rate that gives the monthly payment using
+    Halley's method with analytic derivatives of calc_pmt.
+
+    Parameters
+    ----------
+    loan_amount: array_like
+        Current loan amount.
+    pmt: array_like
+        Monthly payment.
+    months: array_like
+        Number of months remaining on the loan.
+    fv: array_like
+        Outstanding loan balance in the final period.
+    lower: float
+        Lower bound for the rate if the solver falls back to Brent's
+        method.
+    upper: float
+        Upper bound for the rate if the solver falls back to Brent's
+        method.
+    tolerance: float
+        Largest payment error, relative to the payment, for which a
+        rate is returned.
+
+    Returns
+    -------
+    r_monthly: array_like
+        Monthly coupon interest rate.
+        NaN where no rate in [lower, upper] gives the payment.
+    """
+
+    shape = np.broadcast(loan_amount, pmt, months, fv).shape
+    loan_amount, pmt, months, fv = [
+        np.atleast_1d(np.asarray(x, dtype=float)).ravel() for x in
+        np.broadcast_arrays(loan_amount, pmt, months, fv)]
+
+    def pmt_error(r_monthly, loan_amount, pmt, months, fv):
+        value, d_value, d2_value = calc_pmt_derivatives(
+            loan_amount, r_monthly, months, fv)
+        return value - pmt, d_value, d2_value
+
+    # Initial guess from the average interest paid per month:
+    guess = 2.0*(months*pmt - loan_amount) / (loan_amount*(months+1.0))
+    guess = np.clip(guess, lower, upper)
+
+    optimal = newton(pmt_error, guess,
+                     vector_args=(loan_amount, pmt, months, fv),
+                     lower=lower, upper=upper)
+
+    # Reject rates that do not reproduce the payment:
+    solved = np.abs(optimal.func_value) <= tolerance*np.abs(pmt)
+    r_monthly = np.where(solved, optimal.root_value, np.nan)
+
+    return r_monthly.reshape(shape)[()]
+
+
+def calc_implied_yield(cash_flow, price, month_i=1, lower=-0.5,
+                       upper=1.0, tolerance=1e-8):
+    """
+    Finds the constant annual yield at which the market value of the
+    cash flows equals the price using Halley's method with analytic
+    derivatives of the discounting in calc_market_value.
+
+    Parameters
+    ----------
+    cash_flow: array_like
+        Array of future cash flows, or 2D array with one row of cash
+        flows per price.
+    price: array_like
+        Price of the cash flows.
+    month_i: int
+        Current month.
+    lower: float
+        Lower bound for the yield if the solver falls back to Brent's
+        method.
+    upper: float
+        Upper bound for the yield if the solver falls back to Brent's
+        method.
+    tolerance: float
+        Largest price error, relative to the price, for which a yield
+        is returned.
+
+    Returns
+    -------
+    yield_annual: array_like
+        Annual yield.
+        NaN where no yield in [lower, upper] gives the price.
+    """
+
+    cash_flow = np.asarray(cash_flow, dtype=float)
+    shape = np.broadcast_shapes(cash_flow.shape[:-1], np.shape(price))
+    price = np.broadcast_to(np.asarray(price, dtype=float), shape)
+    price = np.atleast_1d(price).ravel()
+
+    # Initial guess from the payment weighted average month:
+    remaining_payments = cash_flow[..., month_i:]
+    k = np.arange(1, remaining_payments.shape[-1]+1)
+    total = remaining_payments.sum(axis=-1)
+    average_month = (remaining_payments @ k) / total
+    guess = 12.0*((total/price)**(1.0/average_month) - 1.0)
+    guess = np.clip(guess, lower, upper)
+
+    if cash_flow.ndim == 1:
+        def price_error(yield_annual, price):
+            value, d_value, d2_value = calc_market_value_derivatives(
+                cash_flow, yield_annual, month_i)
+            return value - price, d_value, d2_value
+
+        vector_args = (price,)
+    else:
+        def price_error(yield_annual, cash_flow, price):
+            value, d_value, d2_value = calc_market_value_derivatives(
+                cash_flow, yield_annual, month_i)
+            return value - price, d_value, d2_value
+
+        vector_args = (cash_flow.reshape(-1, cash_flow.shape[-1]),
+                       price)
+
+    optimal = newton(price_error, guess, vector_args=vector_args,
+                     lower=lower, upper=upper)
+
+    # Reject yields that do not reproduce the price:
+    solved = np.abs(optimal.func_value) <= tolerance*np.abs(price)
+    yield_annual = np.where(solved, optimal.root_value, np.nan)
+
+    return yield_annual.reshape(shape)[()]
+
+
+def calc_implied_months(loan_amount, r_monthly, pmt, fv=0.0):
+    """
+    Finds the number of months that gives the monthly payment. Inverts
+    the annuity formula of calc_pmt in closed form, so no iterations
+    are needed.
+
+    Parameters
+    ----------
+    loan_amount: array_like
+        Current loan amount.
+    r_monthly: array_like
+        Monthly coupon interest rate.
+    pmt: array_like
+        Monthly payment.
+    fv: array_like
+        Outstanding loan balance in the final period.
+
+    Returns
+    -------
+    months: array_like
+        Number of months remaining on the loan. Not rounded.
+        NaN where the payment does not cover the interest.
+    """
+
+    # Solve pmt = r * (loan_amount + fv*v**n) / (1 - v**n) for n:
+    interest = r_monthly * loan_amount
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = np.log((pmt + r_monthly*fv) / (pmt - interest)) / \
+            np.log(1.0 + r_monthly)
+
+    months = np.where(pmt > interest, months, np.nan)
+
+    return months[()]
@@ -3,7 +3,7 @@ from setuptools import setup, find_packages
 with open("README.md", "r") as readme_file:
     README = readme_file.read()
 
-requirements = ["numpy", "pandas", "matplotlib"]
+requirements = ["numpy>=1.20", "pandas>=1.2", "matplotlib"]
 
 setup(name="mortgages",
       version="0.0.1",
@@ -14,7 +14,8 @@ setup(name="mortgages",
       url="https://github.com/SeanBrunson/mortgages",
       packages=find_packages(),
       install_requires=requirements,
-      classifiers=["Programming Language :: Python :: 3.5",
+      python_requires=">=3.7",
+      classifiers=["Programming Language :: Python :: 3.7",
                    "License :: OSI Approved :: MIT License",
                   ],
      )
@@ -0,0 +1,20 @@
+# Tests for the opt-in instrumentation:
+
+from mortgages import Fixed
+from mortgages import instrumentation
+
+
+def test_reset_keeps_recorded_stats_live():
+    instrumentation.reset()
+
+    with instrumentation.record() as stats:
+        Fixed(200000.0, 0.05, 30).schedule
+        assert "Fixed.create_amortization_arrays" in stats
+
+        instrumentation.reset()
+        assert stats == {}
+
+        Fixed(200000.0, 0.05, 30).schedule
+        assert stats["Fixed.create_amortization_arrays"]["calls"] == 1
+
+    instrumentation.reset()
@@ -0,0 +1,149 @@
+# Tests comparing the NumPy pooling with the monthly recurrence of the
+# pandas pool_mortgage it replaces:
+
+import numpy as np
+import pytest
+
+from mortgages import Fixed, Mbs, MbsPool, calc_wac_wam
+
+columns = ["smm", "pool_factor", "pool_balance", "pool_pmt",
+           "pool_interest", "pool_principal", "prepay_dollars",
+           "total_principal", "total_cashflow"]
+
+
+def create_loop_pool(schedule, smm, pool_factor):
+    """
+    Pools a schedule month by month with the formulas of the pandas
+    implementation: no flows in month 0 and prepayments on the balance
+    left after the scheduled principal.
+    """
+
+    months = len(schedule["balance"])
+    pooled = {column: np.zeros(months) for column in columns}
+    pooled["smm"][1:] = smm[1:]
+    pooled["pool_factor"][0] = pool_factor
+    pooled["pool_balance"][0] = schedule["balance"][0]*pool_factor
+
+    for t in range(1, months):
+        factor = pooled["pool_factor"][t-1]
+        pooled["pool_factor"][t] = factor*(1.0 - smm[t])
+        pooled["pool_balance"][t] = \
+            schedule["balance"][t]*pooled["pool_factor"][t]
+        pooled["pool_pmt"][t] = schedule["payment"][t]*factor
+        pooled["pool_interest"][t] = schedule["interest"][t]*factor
+        pooled["pool_principal"][t] = \
+            pooled["pool_pmt"][t] - pooled["pool_interest"][t]
+        pooled["prepay_dollars"][t] = (
+            pooled["pool_balance"][t-1] -
+            pooled["pool_principal"][t])*smm[t]
+
+    pooled["total_principal"] = \
+        pooled["pool_principal"] + pooled["prepay_dollars"]
+    pooled["total_cashflow"] = \
+        pooled["pool_interest"] + pooled["total_principal"]
+
+    return pooled
+
+
+def check_pools(pooled, expected, scale):
+    """
+    Checks that the pooled cash flows agree to float precision relative
+    to the pool balance.
+    """
+
+    for column in expected:
+        np.testing.assert_allclose(pooled[column], expected[column],
+                                   rtol=1e-9, atol=1e-9*scale)
+
+
+@pytest.mark.parametrize("smm, pool_factor", [
+    (0.01, 1.0),
+    (0.0, 0.8),
+    (np.linspace(0.0, 0.03, 361), 0.9),
+])
+def test_mbs_cash_flows_match_loop(smm, pool_factor):
+    mortgage = Fixed(200000.0, 0.05, 30)
+    mbs = Mbs(mortgage, smm, pool_factor)
+    expected = create_loop_pool(mortgage.schedule, mbs.smm,
+                                pool_factor)
+
+    check_pools(mbs.cash_flows, expected, 200000.0)
+
+
+def test_mbs_pool_single_loan_matches_mbs():
+    smm = np.linspace(0.0, 0.02, 361)
+    mbs = Mbs(Fixed(200000.0, 0.05, 30), smm, 0.9)
+    pool = MbsPool([Fixed(200000.0, 0.05, 30)], smm, 0.9)
+
+    for column in ["pool_balance", "pool_pmt", "pool_interest",
+                   "pool_principal", "prepay_dollars",
+                   "total_principal", "total_cashflow"]:
+        np.testing.assert_allclose(pool.cash_flows[column],
+                                   mbs.cash_flows[column],
+                                   rtol=1e-12, atol=1e-6)
+
+
+def test_mbs_pool_sums_loops_of_each_loan():
+    loans = [Fixed(200000.0, 0.05, 30), Fixed(150000.0, 0.04, 15),
+             Fixed(90000.0, 0.065, 20)]
+    pool = MbsPool(loans, 0.01)
+
+    expected = {}
+    for loan in loans:
+        smm = np.full(loan.months+1, 0.01)
+        pooled = create_loop_pool(loan.schedule, smm, 1.0)
+        for column in ["pool_balance", "pool_pmt", "pool_interest",
+                       "prepay_dollars", "total_cashflow"]:
+            flows = np.zeros(361)
+            flows[:loan.months+1] = pooled[column]
+            expected[column] = expected.get(column, 0.0) + flows
+
+    check_pools(pool.cash_flows, expected, 440000.0)
+
+
+def test_calc_wac_wam_matches_loan_loop():
+    loans = [Fixed(200000.0, 0.05, 30), Fixed(150000.0, 0.04, 15),
+             Fixed(90000.0, 0.065, 20)]
+    pool = MbsPool(loans, 0.01)
+    balances = [create_loop_pool(loan.schedule,
+                                 np.full(loan.months+1, 0.01),
+                                 1.0)["pool_balance"] for loan in loans]
+
+    # Balance weighted coupon and remaining months over the months
+    # before the longest loan matures:
+    for t in [0, 1, 100, 179, 180, 239, 300, 359]:
+        weights = np.array([balance[t] if t < len(balance) else 0.0
+                            for balance in balances])
+        coupons = np.array([12.0*loan.r_monthly for loan in loans])
+        remaining = np.array([loan.months - t for loan in loans])
+
+        assert pool.cash_flows["wac"][t] == pytest.approx(
+            weights @ coupons / weights.sum(), rel=1e-9)
+        assert pool.cash_flows["wam"][t] == pytest.approx(
+            weights @ remaining / weights.sum(), rel=1e-9)
+
+    assert pool.wac == pytest.approx(pool.cash_flows["wac"][0])
+    assert pool.wam == pytest.approx(pool.cash_flows["wam"][0])
+
+
+def test_calc_wac_wam_paid_off_pool():
+    pool_balance = np.array([100.0, 50.0, 0.0])
+    pool_interest = np.array([0.0, 0.5, 0.25])
+    weighted_months = np.array([200.0, 100.0, 0.0])
+
+    wac, wam = calc_wac_wam(pool_balance, pool_interest,
+                            weighted_months)
+
+    np.testing.assert_allclose(wac, [0.06, 0.06, 0.0])
+    np.testing.assert_allclose(wam, [2.0, 1.0, 0.0])
+
+
+def test_mbs_pool_balance_factor():
+    pool = MbsPool([Fixed(200000.0, 0.05, 30)], 0.0)
+
+    # Without prepayments only the scheduled principal reduces the
+    # balance factor:
+    np.testing.assert_allclose(
+        pool.cash_flows["balance_factor"],
+        pool.cash_flows["pool_balance"] / 200000.0)
+    assert "pool_factor" not in pool.cash_flows
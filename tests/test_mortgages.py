@@ -0,0 +1,134 @@
+# Tests comparing the closed-form amortization schedules with the
+# monthly recurrence of Mortgage.update_loan:
+
+import numpy as np
+import pytest
+
+from mortgages import Adjustable, Fixed, Mortgage
+
+columns = ["balance", "payment", "interest", "principal"]
+
+
+def create_loop_schedule(mortgage):
+    """
+    Builds the schedule of a fresh loan with the monthly loop of the
+    Mortgage base class.
+    """
+
+    return Mortgage.create_amortization_arrays(mortgage)
+
+
+def check_schedules(schedule, expected):
+    """
+    Checks that two schedules agree to float precision relative to the
+    loan amount.
+    """
+
+    scale = expected["balance"][0]
+    for column in columns:
+        np.testing.assert_allclose(schedule[column], expected[column],
+                                   rtol=1e-9, atol=1e-9*scale)
+
+
+@pytest.mark.parametrize("loan_amount, r_annual, years, fv", [
+    (200000.0, 0.045, 30, 0.0),
+    (350000.0, 0.07, 15, 0.0),
+    (100000.0, 0.03, 10, 20000.0),
+])
+def test_fixed_schedule_matches_loop(loan_amount, r_annual, years, fv):
+    schedule = Fixed(loan_amount, r_annual, years, fv).schedule
+    expected = create_loop_schedule(
+        Fixed(loan_amount, r_annual, years, fv))
+
+    check_schedules(schedule, expected)
+
+
+def test_fixed_calc_month_matches_loop():
+    expected = create_loop_schedule(Fixed(250000.0, 0.05, 30))
+    mortgage = Fixed(250000.0, 0.05, 30)
+    month_i = np.array([0, 1, 2, 59, 180, 359, 360])
+
+    balance, interest, principal = mortgage.calc_month(month_i)
+
+    np.testing.assert_allclose(balance, expected["balance"][month_i],
+                               rtol=1e-9, atol=1e-4)
+    np.testing.assert_allclose(interest,
+                               expected["interest"][month_i],
+                               rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(principal,
+                               expected["principal"][month_i],
+                               rtol=1e-9, atol=1e-6)
+
+
+def test_fixed_calc_month_scalar():
+    mortgage = Fixed(250000.0, 0.05, 30)
+    balance, interest, principal = mortgage.calc_month(12)
+
+    assert np.ndim(balance) == 0
+    assert balance == pytest.approx(mortgage.schedule["balance"][12])
+    assert interest + principal == pytest.approx(mortgage.pmt)
+
+
+def test_calc_month_rejects_month_out_of_range():
+    mortgage = Fixed(250000.0, 0.05, 30)
+
+    with pytest.raises(ValueError):
+        mortgage.calc_month(361)
+
+
+def create_rate_path(months, seed=0):
+    """
+    Creates annual rates that reset every 12 months.
+    """
+
+    rng = np.random.default_rng(seed)
+    resets = 0.04 + 0.02*rng.random(-(-months // 12))
+
+    return np.repeat(resets, 12)[:months]
+
+
+@pytest.mark.parametrize("years, years_teaser, fv, varying", [
+    (30, 5, 0.0, False),
+    (30, 5, 0.0, True),
+    (30, 3, 15000.0, True),
+    (15, 0, 0.0, True),
+    (20, 2, 10000.0, False),
+])
+def test_adjustable_schedule_matches_loop(years, years_teaser, fv,
+                                          varying):
+    months = (years - years_teaser)*12
+    r_annual = create_rate_path(months) if varying else 0.055
+
+    def create_mortgage():
+        return Adjustable(300000.0, r_annual, years, 0.025,
+                          years_teaser, fv)
+
+    mortgage = create_mortgage()
+    expected_mortgage = create_mortgage()
+    expected = create_loop_schedule(expected_mortgage)
+
+    # The final reset is set before the schedule is built:
+    assert mortgage.pmt == pytest.approx(expected_mortgage.pmt,
+                                         rel=1e-9)
+    assert mortgage.r_monthly == expected_mortgage.r_monthly
+
+    check_schedules(mortgage.schedule, expected)
+
+
+def test_adjustable_calc_month_matches_loop():
+    r_annual = create_rate_path(300, seed=1)
+    expected = create_loop_schedule(
+        Adjustable(300000.0, r_annual, 30, 0.025, 5, 20000.0))
+    mortgage = Adjustable(300000.0, r_annual, 30, 0.025, 5, 20000.0)
+    month_i = np.array([0, 1, 59, 60, 61, 72, 73, 200, 359, 360])
+
+    balance, interest, principal = mortgage.calc_month(month_i)
+
+    np.testing.assert_allclose(balance, expected["balance"][month_i],
+                               rtol=1e-9, atol=1e-4)
+    np.testing.assert_allclose(interest,
+                               expected["interest"][month_i],
+                               rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(principal,
+                               expected["principal"][month_i],
+                               rtol=1e-9, atol=1e-6)
@@ -0,0 +1,40 @@
+# Tests for the scenario store:
+
+import os
+
+import numpy as np
+import pytest
+
+from mortgages import ScenarioStore, VasicekRates
+
+
+def test_load_paths_matches_create_paths_parallel(tmp_path):
+    rates = VasicekRates(0.03, 0.3, 0.05, 0.01, 2)
+    store = ScenarioStore(str(tmp_path))
+
+    r_array, discount = store.load_paths(rates, 1/12, 50,
+                                         random_state=7, chunk_size=20)
+    expected = rates.create_paths_parallel(1/12, 50, chunk_size=20,
+                                           random_state=7)
+
+    np.testing.assert_array_equal(r_array, expected)
+    np.testing.assert_allclose(
+        discount[-1], np.exp(-np.sum(expected[1:]/12, axis=0)))
+
+
+@pytest.mark.parametrize("paths, chunk_size, kwargs", [
+    (0, 10, {}),
+    (10, 0, {}),
+    (10, 5, {"block_size": 0}),
+])
+def test_load_paths_rejects_empty_sizes(tmp_path, paths, chunk_size,
+                                        kwargs):
+    rates = VasicekRates(0.03, 0.3, 0.05, 0.01, 2)
+    store = ScenarioStore(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        store.load_paths(rates, 1/12, paths, random_state=7,
+                         chunk_size=chunk_size, **kwargs)
+
+    # No partial files are left behind:
+    assert os.listdir(str(tmp_path)) == []